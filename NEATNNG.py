@@ -1,5 +1,4 @@
 #************************************** Importando librerías *********************************************#
-import networkx as nx
 import requests
 import gzip
 import shutil
@@ -8,26 +7,36 @@ import numpy as np
 import warnings
 import unittest
 from typing import Dict, Tuple, List, Callable, Optional
-import matplotlib.pyplot as plt
 import itertools
+import heapq
 import logging
 import pickle
 import os
+import hashlib
 from tqdm import tqdm
-from torch_geometric.data import Data
 import torch
 import torch.nn.functional as F
-from torch_geometric.nn import GCNConv, global_mean_pool
 from torch.nn import Linear
 import torch.nn as nn
-import random
-import torch
-import torch.nn as nn
-import numpy as np
-from typing import List, Callable
-import copy
-from sortedcontainers import SortedList
-from networkx.drawing.nx_agraph import graphviz_layout
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import threading
+import weakref
+from functools import lru_cache, partial, update_wrapper
+from collections import OrderedDict, defaultdict, deque
+import math
+
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+try:
+    import ray
+    _RAY_AVAILABLE = True
+except ImportError:
+    _RAY_AVAILABLE = False
 
 #************************************** Definición de clases *********************************************#
 
@@ -50,6 +59,9 @@ class Gene:
         Devuelve una representación en cadena del gen.
     """
 
+    # Sin __dict__ por instancia: se crean en gran número
+    __slots__ = ('gene_id', 'gene_type', 'innovation_number')
+
     def __init__(self, gene_id: int, gene_type: str, innovation_number: int = None):
         """
         Inicializa un Gen.
@@ -116,6 +128,8 @@ class ConnectionGene:
     __repr__()
         Devuelve una representación en cadena del gen de conexión.
     """
+    __slots__ = ('in_node_id', 'out_node_id', 'weight', 'enabled', 'innovation_number')
+
     def __init__(self, in_node_id: int, out_node_id: int, weight: float, enabled: bool, innovation_number: int):
         """
         Inicializa un Gen de Conexión.
@@ -152,25 +166,26 @@ class ConnectionGene:
 
 class ConnectionMatrix:
     """
-    Clase para gestionar dinámicamente una matriz de conexiones booleanas entre nodos.
+    Clase para gestionar dinámicamente las conexiones dirigidas entre nodos.
+
+    Las conexiones se guardan como conjuntos de adyacencia (uno de salida y otro
+    de entrada por nodo), lo que ocupa O(V+E) en memoria y permite agregar,
+    eliminar y consultar conexiones en O(1). La matriz densa sólo se construye
+    cuando se pide explícitamente con `obtener_matriz`.
 
     Attributes
     ----------
-    matriz : numpy.ndarray
-        Matriz de adyacencia de conexiones booleanas.
-    nodo_a_indice : dict
-        Mapeo de IDs de nodos a índices de la matriz.
-    indice_a_nodo : dict
-        Mapeo inverso de índices a IDs de nodos.
-    siguiente_indice : int
-        Índice disponible para el próximo nodo agregado.
+    salientes : collections.defaultdict
+        Mapeo de ID de nodo al conjunto de nodos destino de sus conexiones.
+    entrantes : collections.defaultdict
+        Mapeo de ID de nodo al conjunto de nodos origen de sus conexiones.
     nodos : set
         Conjunto de IDs de nodos presentes.
 
     Methods
     -------
     agregar_nodo(nodo_id)
-        Agrega un nuevo nodo a la matriz.
+        Agrega un nuevo nodo.
     agregar_conexion(nodo_desde, nodo_hasta)
         Agrega una conexión entre dos nodos existentes.
     eliminar_conexiones_nodo(nodo_id)
@@ -180,7 +195,7 @@ class ConnectionMatrix:
     existe_conexion(nodo_desde, nodo_hasta)
         Verifica si existe una conexión entre dos nodos.
     obtener_matriz()
-        Devuelve la matriz actual de conexiones.
+        Construye la matriz booleana de adyacencia con los nodos ordenados por ID.
     modificar_conexiones_nodo(nodo_id, nuevas_conexiones_entrantes, nuevas_conexiones_salientes)
         Modifica las conexiones entrantes y salientes de un nodo.
     conexiones_entrantes(nodo_id)
@@ -191,49 +206,16 @@ class ConnectionMatrix:
 
     def __init__(self):
         """
-        Inicializa la matriz de conexiones.
+        Inicializa los conjuntos de adyacencia vacíos.
         """
-        self.matriz = np.empty((0, 0), dtype=bool)  # Inicializa con una matriz vacía
-        self.nodo_a_indice = {}  # Mapeo de ID de nodo a índice de matriz
-        self.indice_a_nodo = {}  # Mapeo de índice de matriz a ID de nodo
-        self.siguiente_indice = 0  # Índice para el próximo nodo a agregar
+        self.salientes = defaultdict(set)  # Mapeo de ID de nodo a sus destinos
+        self.entrantes = defaultdict(set)  # Mapeo de ID de nodo a sus orígenes
         self.nodos = set()  # Conjunto para guardar los IDs de los nodos presentes
-
-    def reindexar_nodos(self):
-        """
-        Reindexa los nodos y redimensiona la matriz.
-
-        Este método se llama internamente para asegurar que los índices de la matriz
-        correspondan a los IDs de los nodos después de agregar o eliminar nodos.
-        """
-        nodos_ordenados = sorted(list(self.nodos))  # Ordena la lista de nodos
-        nuevo_tamano = len(nodos_ordenados)  # Se redimensionará la matriz
-        nueva_matriz = np.zeros((nuevo_tamano, nuevo_tamano), dtype=bool)  # Nueva matriz booleana
-        nuevo_nodo_a_indice = {}  # Se creará una nueva lista de nodos a índices
-        nuevo_indice_a_nodo = {}  # Se creará una nueva lista de índices a nodos
-
-        for i, nodo_id in enumerate(nodos_ordenados):  # Se van a actualizar las listas
-            nuevo_nodo_a_indice[nodo_id] = i
-            nuevo_indice_a_nodo[i] = nodo_id
-
-        # Se recorre la vieja matriz, buscando en los indices los nuevos indices
-        for indice_origen in range(len(self.matriz)):  # Se obtienen los indices origen
-            for indice_destino in range(len(self.matriz)):  # Se obtienen los indices destino
-                if self.matriz[indice_origen, indice_destino]:  # Si esta conexion existe en la matriz anterior
-                    nodo_origen = self.indice_a_nodo[indice_origen]  # Se ubica el nodo correspondiente al origen
-                    nodo_destino = self.indice_a_nodo[indice_destino]  # Se ubica el nodo correspondiente al destino
-                    nuevo_indice_origen = nuevo_nodo_a_indice[nodo_origen]  # Se obtiene el nuevo indice origen
-                    nuevo_indice_destino = nuevo_nodo_a_indice[nodo_destino]  # Se obtiene el nuevo indice destino
-                    nueva_matriz[nuevo_indice_origen, nuevo_indice_destino] = True  # Se agrega la conexion a la nueva matriz
-
-        self.matriz = nueva_matriz  # Se actualiza la matriz
-        self.nodo_a_indice = nuevo_nodo_a_indice  # Se actualizan los diccionarios
-        self.indice_a_nodo = nuevo_indice_a_nodo
-        self.siguiente_indice = nuevo_tamano  # Se aumenta el siguiente indice
+        self._matriz = None  # Matriz densa construida en la última llamada a obtener_matriz
 
     def agregar_nodo(self, nodo_id: int) -> None:
         """
-        Agrega un nuevo nodo a la matriz de conexiones.
+        Agrega un nuevo nodo.
 
         Parameters
         ----------
@@ -241,12 +223,8 @@ class ConnectionMatrix:
             ID del nodo a agregar.
         """
         if nodo_id not in self.nodos:  # Solo agrega si no existe
-            # Se agrega el nodo en los diccionarios
-            self.nodo_a_indice[nodo_id] = self.siguiente_indice  # Se actualiza el diccionario
-            self.indice_a_nodo[self.siguiente_indice] = nodo_id  # Se actualiza el diccionario
-            self.siguiente_indice = self.siguiente_indice + 1  # Aumenta en 1 el siguiente índice
-            self.nodos.add(nodo_id)  # Se agrea el nodo al conjunto de nodos
-            self.reindexar_nodos()  # Se reindexan los nodos
+            self.nodos.add(nodo_id)
+            self._matriz = None  # La matriz densa cambia de tamaño
 
     def agregar_conexion(self, nodo_desde: int, nodo_hasta: int) -> None:
         """
@@ -260,9 +238,9 @@ class ConnectionMatrix:
             ID del nodo de destino.
         """
         if nodo_desde in self.nodos and nodo_hasta in self.nodos:
-            indice_desde = self.nodo_a_indice[nodo_desde]  # Se obtiene el índice del origen
-            indice_hasta = self.nodo_a_indice[nodo_hasta]  # Se obtiene el índice del destino
-            self.matriz[indice_desde, indice_hasta] = True  # Se activa la conexión
+            self.salientes[nodo_desde].add(nodo_hasta)  # Se activa la conexión
+            self.entrantes[nodo_hasta].add(nodo_desde)  # Se actualiza el espejo
+            self._matriz = None
 
     def eliminar_conexiones_nodo(self, nodo_id: int) -> None:
         """
@@ -275,9 +253,36 @@ class ConnectionMatrix:
         """
         if nodo_id not in self.nodos:
             raise IndexError("El nodo no existe en la matriz.")
-        indice = self.nodo_a_indice[nodo_id]
-        self.matriz[indice, :] = False  # Elimina conexiones salientes
-        self.matriz[:, indice] = False  # Elimina conexiones entrantes
+        # Sólo se recorren los vecinos del nodo, O(grado)
+        for nodo_hasta in list(self.salientes.get(nodo_id, ())):
+            self._quitar_conexion(nodo_id, nodo_hasta)  # Elimina conexiones salientes
+        for nodo_desde in list(self.entrantes.get(nodo_id, ())):
+            self._quitar_conexion(nodo_desde, nodo_id)  # Elimina conexiones entrantes
+
+    def _quitar_conexion(self, nodo_desde: int, nodo_hasta: int) -> None:
+        """
+        Quita una conexión de ambos conjuntos de adyacencia.
+
+        Los conjuntos que quedan vacíos se eliminan para que la memoria siga
+        siendo proporcional al número de conexiones.
+
+        Parameters
+        ----------
+        nodo_desde : int
+            ID del nodo de origen.
+        nodo_hasta : int
+            ID del nodo de destino.
+        """
+        destinos = self.salientes.get(nodo_desde)
+        if destinos is not None and nodo_hasta in destinos:
+            destinos.discard(nodo_hasta)
+            if not destinos:
+                del self.salientes[nodo_desde]
+            origenes = self.entrantes[nodo_hasta]
+            origenes.discard(nodo_desde)
+            if not origenes:
+                del self.entrantes[nodo_hasta]
+            self._matriz = None
 
     def eliminar_nodo(self, nodo_id: int) -> None:
         """
@@ -288,20 +293,11 @@ class ConnectionMatrix:
         nodo_id : int
             ID del nodo a eliminar.
         """
-
         # Si el id del nodo se encuentra en la lista
         if nodo_id in self.nodos:
-            # Si es el único nodo
-            if len(self.nodos) == 1:
-                self.matriz = np.empty((0, 0), dtype=bool)  # Se actualiza la matriz a una vacía
-                self.nodo_a_indice = {}  # Diccionario vacío
-                self.indice_a_nodo = {}  # Diccionario vacío
-                self.siguiente_indice = 0  # Índice para el próximo nodo a agregar
-                self.nodos = set()  # Conjunto para guardar los ids de los nodos presentes
-            else:
-                self.eliminar_conexiones_nodo(nodo_id)  # Elimina las conexiones del nodo
-                self.nodos.remove(nodo_id)
-                self.reindexar_nodos()
+            self.eliminar_conexiones_nodo(nodo_id)  # Elimina las conexiones del nodo
+            self.nodos.remove(nodo_id)
+            self._matriz = None
 
     def existe_conexion(self, nodo_desde: int, nodo_hasta: int) -> bool:
         """
@@ -321,20 +317,38 @@ class ConnectionMatrix:
         """
         if nodo_desde not in self.nodos or nodo_hasta not in self.nodos:
             return False
-        indice_desde = self.nodo_a_indice[nodo_desde]
-        indice_hasta = self.nodo_a_indice[nodo_hasta]
-        return self.matriz[indice_desde, indice_hasta]
+        return nodo_hasta in self.salientes.get(nodo_desde, ())
 
     def obtener_matriz(self) -> np.ndarray:
         """
-        Devuelve la matriz actual de conexiones.
+        Construye la matriz actual de conexiones.
+
+        Las filas y columnas siguen el orden ascendente de los IDs de los nodos.
+        La matriz se guarda y se reutiliza mientras no cambien los nodos ni las
+        conexiones, de modo que las consultas repetidas no vuelven a reservar memoria.
+        Por eso es de solo lectura; para modificarla hay que copiarla (`.copy()`).
 
         Returns
         -------
         numpy.ndarray
-            Matriz booleana de adyacencia.
-        """
-        return self.matriz
+            Matriz booleana de adyacencia, de solo lectura.
+        """
+        if self._matriz is not None:
+            return self._matriz
+        nodos_ordenados = np.array(sorted(self.nodos), dtype=np.int64)
+        num_conexiones = sum(len(destinos) for destinos in self.salientes.values())
+        # Se aplanan las conexiones en dos arreglos paralelos (origen, destino)
+        origenes = np.fromiter((nodo_desde for nodo_desde, destinos in self.salientes.items() for _ in destinos),
+                               dtype=np.int64, count=num_conexiones)
+        destinos = np.fromiter((nodo_hasta for destinos in self.salientes.values() for nodo_hasta in destinos),
+                               dtype=np.int64, count=num_conexiones)
+        matriz = np.zeros((len(nodos_ordenados), len(nodos_ordenados)), dtype=bool)
+        # Una sola asignación vectorizada: los índices salen de buscar cada ID en los nodos ordenados
+        matriz[np.searchsorted(nodos_ordenados, origenes), np.searchsorted(nodos_ordenados, destinos)] = True
+        matriz.setflags(write=False)  # Se comparte entre llamadas: escribir en ella corrompería la caché
+        self._matriz = matriz
+
+        return matriz
 
     def modificar_conexiones_nodo(self, nodo_id: int, nuevas_conexiones_entrantes: dict, nuevas_conexiones_salientes: dict) -> None:
         """
@@ -351,23 +365,23 @@ class ConnectionMatrix:
         """
         # Si el nodo pertenece
         if nodo_id in self.nodos:
-            # Se obtiene el índice
-            indice_nodo = self.nodo_a_indice[nodo_id]
             # Se recorre el diccionario de conexiones entrantes
             for nodo_conectado, valor_conexion in nuevas_conexiones_entrantes.items():
                 # Si el nodo pertenece
                 if nodo_conectado in self.nodos:
-                    # Se obtiene el índice
-                    indice_conectado = self.nodo_a_indice[nodo_conectado]
                     # Se modifica la conexión
-                    self.matriz[indice_conectado, indice_nodo] = valor_conexion  # conexiones entrantes
+                    if valor_conexion:
+                        self.agregar_conexion(nodo_conectado, nodo_id)  # conexiones entrantes
+                    else:
+                        self._quitar_conexion(nodo_conectado, nodo_id)
             for nodo_conectado, valor_conexion in nuevas_conexiones_salientes.items():
                 # Si el nodo pertenece
                 if nodo_conectado in self.nodos:
-                    # Se obtiene el índice
-                    indice_conectado = self.nodo_a_indice[nodo_conectado]
                     # Se modifica la conexión
-                    self.matriz[indice_nodo, indice_conectado] = valor_conexion  # conexiones salientes
+                    if valor_conexion:
+                        self.agregar_conexion(nodo_id, nodo_conectado)  # conexiones salientes
+                    else:
+                        self._quitar_conexion(nodo_id, nodo_conectado)
 
     def conexiones_entrantes(self, nodo_id: int) -> list:
         """
@@ -385,13 +399,7 @@ class ConnectionMatrix:
         """
         if nodo_id not in self.nodos:
             return []
-        indice_nodo = self.nodo_a_indice[nodo_id]
-        nodos_entrantes = []
-        for nodo_desde in self.nodos:
-            indice_desde = self.nodo_a_indice[nodo_desde]
-            if self.matriz[indice_desde, indice_nodo]:
-                nodos_entrantes.append(nodo_desde)
-        return nodos_entrantes
+        return list(self.entrantes.get(nodo_id, ()))
 
     def conexiones_salientes(self, nodo_id: int) -> list:
         """
@@ -409,21 +417,196 @@ class ConnectionMatrix:
         """
         if nodo_id not in self.nodos:
             return []
-        indice_nodo = self.nodo_a_indice[nodo_id]
-        nodos_salientes = []
-        for nodo_hasta in self.nodos:
-            indice_hasta = self.nodo_a_indice[nodo_hasta]
-            if self.matriz[indice_nodo, indice_hasta]:
-                nodos_salientes.append(nodo_hasta)
-        return nodos_salientes
+        return list(self.salientes.get(nodo_id, ()))
+
+class ModifiableNet(nn.Module):
+    """
+    Red de arquitectura fija (num_inputs -> 64 -> 32 -> 1) sobre la que se proyectan
+    las conexiones de un FeedforwardGenome para calcular su fitness.
+    """
+    def __init__(self, num_inputs):
+        super().__init__()
+        self.fc1 = nn.Linear(num_inputs, 64)
+        self.bn1 = nn.BatchNorm1d(64)
+        self.relu1 = nn.ReLU()
+        self.fc2 = nn.Linear(64, 32)
+        self.bn2 = nn.BatchNorm1d(32)
+        self.relu2 = nn.ReLU()
+        self.fc3 = nn.Linear(32, 1)
+        self._initialize_weights()
+
+    def _initialize_weights(self):
+        for m in self.modules():
+            if isinstance(m, nn.Linear):
+                nn.init.xavier_uniform_(m.weight)
+                nn.init.zeros_(m.bias) # Biases are initialized to zero here
+            elif isinstance(m, nn.BatchNorm1d):
+                nn.init.ones_(m.weight)
+                nn.init.zeros_(m.bias)
+
+    def forward(self, x):
+        x = self.fc1(x)
+        x = self.bn1(x)
+        x = self.relu1(x)
+        x = self.fc2(x)
+        x = self.bn2(x)
+        x = self.relu2(x)
+        x = self.fc3(x)
+        return x
+
+    @torch.no_grad()
+    def fold_batchnorm(self) -> 'ModifiableNet':
+        """
+        Integra cada BatchNorm1d en la capa lineal que la precede y la sustituye por nn.Identity.
+
+        Solo es exacto en modo evaluación, donde BatchNorm es la transformación afín fija
+        y = (x - running_mean) * weight / sqrt(running_var + eps) + bias. Devuelve la propia red.
+        """
+        for linear_name, bn_name in (('fc1', 'bn1'), ('fc2', 'bn2')):
+            linear, bn = getattr(self, linear_name), getattr(self, bn_name)
+            if not isinstance(bn, nn.BatchNorm1d):
+                continue
+            scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+            linear.weight.mul_(scale.unsqueeze(1))
+            linear.bias.copy_((linear.bias - bn.running_mean) * scale + bn.bias)
+            setattr(self, bn_name, nn.Identity())
+        return self.eval()
+
+# fold_batchnorm de una BatchNorm1d recién inicializada (peso 1, bias 0, media 0, varianza 1 y
+# eps 1e-5) solo multiplica por este factor los pesos de la capa lineal anterior
+_FRESH_BATCHNORM_SCALE = 1.0 / math.sqrt(1.0 + 1e-5)
+
+class _CompiledFallback:
+    """
+    Envoltorio de `torch.compile` que nunca impide la evaluación: si torch.compile no está
+    disponible o la compilación falla (p. ej. sin compilador de C o en plataformas que Dynamo no
+    soporta), avisa una vez y a partir de entonces llama a la función original. Dynamo no es
+    seguro entre hilos, así que fuera del hilo principal también se usa la función original.
+    """
+    def __init__(self, function: Callable, **compile_kwargs):
+        update_wrapper(self, function, updated=())  # Conserva el nombre y la documentación de la función
+        self.function = function
+        self.compiled = None
+        if hasattr(torch, 'compile'):
+            try:
+                self.compiled = torch.compile(function, **compile_kwargs)
+            except Exception as error:
+                self._disable(error)
+
+    def _disable(self, error: Exception):
+        warnings.warn(f"torch.compile no está disponible ({error}); se usará la versión sin compilar.")
+        self.compiled = None
+
+    def __call__(self, *args, **kwargs):
+        if self.compiled is None or threading.current_thread() is not threading.main_thread():
+            return self.function(*args, **kwargs)
+        try:
+            return self.compiled(*args, **kwargs)
+        except Exception as error:
+            # Si la versión original también falla, el error no es de la compilación y se propaga
+            result = self.function(*args, **kwargs)
+            self._disable(error)
+            return result
+
+_thread_networks = threading.local()  # {num_inputs: (red, red compilada)} de cada hilo, ver _compiled_network
+
+def _compiled_network(num_inputs: int) -> Tuple[ModifiableNet, Callable]:
+    """
+    Devuelve una ModifiableNet en modo evaluación y su versión compilada con `torch.compile`,
+    una por cada número de entradas y por hilo.
+
+    Todos los genomas comparten la misma arquitectura, así que la red se crea y se compila una
+    sola vez y cada genoma solo escribe sus pesos en ella (`FeedforwardGenome._fill_network_weights`).
+    Cada hilo tiene su propia red, de modo que dos hilos nunca escriben a la vez en los mismos
+    parámetros. La red tiene las BatchNorm ya integradas (`fold_batchnorm`), así que espera pesos
+    plegados. Si la compilación falla se usa la red sin compilar (ver `_CompiledFallback`).
+    """
+    networks = getattr(_thread_networks, 'networks', None)
+    if networks is None:
+        networks = _thread_networks.networks = {}
+    if num_inputs not in networks:
+        net = ModifiableNet(num_inputs).fold_batchnorm()
+        networks[num_inputs] = (net, _CompiledFallback(net, dynamic=True))
+    return networks[num_inputs]
+
+@lru_cache(maxsize=32)
+def _network_layout(nodes: tuple, edges: tuple, method: str) -> dict:
+    """
+    Calcula (una sola vez por topología) las posiciones de los nodos para visualizar un genoma.
+
+    La disposición solo depende de los nodos y las aristas, no de pesos ni bias, así que
+    volver a dibujar el mismo genoma no repite el cálculo. El resultado es compartido entre
+    llamadas y no debe modificarse.
+
+    Attributes
+    ----------
+    nodes (tuple): IDs de los nodos, en orden de inserción.
+    edges (tuple): Pares (origen, destino).
+    method (str): 'spring' (`nx.spring_layout`) o 'dot' (Graphviz, de izquierda a derecha).
+    """
+    import networkx as nx  # Solo se necesita para visualizar
+
+    G = nx.DiGraph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
+    if method == 'dot':
+        return nx.nx_agraph.graphviz_layout(G, prog='dot', args='-Grankdir=LR')  # Left-to-right layout
+    return nx.spring_layout(G)
+
+def _activate_kernel(indptr, edge_sources, edge_weights, biases, activations, output_rows, inputs):
+    """
+    Evalúa la red de un genoma a partir de su plan en formato CSR (ver `FeedforwardGenome._forward_plan`).
+
+    Solo usa arreglos de NumPy y escalares para que Numba pueda compilarla; las filas no
+    de entrada se recorren en orden de evaluación y cada una suma sus conexiones entrantes.
+    """
+    num_inputs = inputs.shape[0]
+    values = np.zeros(num_inputs + biases.shape[0])
+    values[:num_inputs] = inputs
+    for k in range(biases.shape[0]):
+        total = biases[k]
+        for edge in range(indptr[k], indptr[k + 1]):
+            total += edge_weights[edge] * values[edge_sources[edge]]
+        activation = activations[k]
+        if activation == 1:  # relu
+            total = total if total > 0 else 0.0
+        elif activation == 2:  # sigmoid; exp(-total) overflows below ~-709
+            total = 0.0 if total < -50.0 else 1.0 / (1.0 + math.exp(-total))
+        elif activation == 3:  # tanh
+            total = math.tanh(total)
+        values[num_inputs + k] = total
+    outputs = np.zeros(output_rows.shape[0])
+    for i in range(output_rows.shape[0]):
+        if output_rows[i] >= 0:
+            outputs[i] = values[output_rows[i]]
+    return outputs
+
+if _NUMBA_AVAILABLE:
+    _activate_kernel = njit(cache=True, fastmath=True)(_activate_kernel)
 
 class FeedforwardGenome:
     """
     Represents the genome of a feedforward neural network with bias.
     """
-    def __init__(self, genome_id: int, num_inputs: int, num_outputs: int, innovation_manager: 'InnovationManager', initial_hidden_nodes: int = 8):
+    # Derived indexes rebuilt lazily from genes/connections; never pickled
+    _CACHE_ATTRS = ('_in_edges', '_out_edges', '_nodes', '_connection_soa', '_nodes_by_type', '_connection_candidates', '_topo', '_plan', '_structural_key_cached', '_structural_hash_cached')
+    # Vectorized hidden/output activations; 'identity' leaves the value unchanged
+    _ACTIVATIONS = {
+        'relu': lambda z: np.maximum(z, 0.0),
+        'sigmoid': lambda z: np.where(z < -50.0, 0.0, 1.0 / (1.0 + np.exp(-np.maximum(z, -50.0)))),
+        'tanh': np.tanh,
+    }
+    # Integer activation codes understood by _activate_kernel
+    _ACTIVATION_IDS = {'identity': 0, 'relu': 1, 'sigmoid': 2, 'tanh': 3}
+    _NODE_TYPE_IDS = {'input': 0, 'hidden': 1, 'output': 2}
+
+    def __init__(self, genome_id: int, num_inputs: int, num_outputs: int, innovation_manager: 'InnovationManager', initial_hidden_nodes: int = 8,
+                 seed: Optional[int] = None):
         """
         Initializes a feedforward genome with bias.
+
+        The genome draws its random numbers from its own NumPy Generator. Without an explicit
+        seed it is seeded from the `random` module, so `random.seed` still reproduces a run.
         """
         self.genome_id = genome_id
         self.genes = {}  # {node_id: (type, activation, innovation_number, bias)}
@@ -432,6 +615,8 @@ class FeedforwardGenome:
         self.fitness = None
         self.innovation_manager = innovation_manager  # Store the innovation manager
         self.output_nodes = []
+        self._rng = np.random.default_rng(seed if seed is not None else random.getrandbits(64))
+        self._invalidate_caches()
 
         # Create input nodes (no bias)
         for _ in range(num_inputs):
@@ -442,31 +627,194 @@ class FeedforwardGenome:
         # Create initial hidden nodes with random bias
         for _ in range(initial_hidden_nodes):
             innovation_number = innovation_manager.create_innovation("gene", self.next_node_id, None)
-            self.genes[self.next_node_id] = ('hidden', random.choice(['relu', 'sigmoid', 'tanh']), innovation_number, random.uniform(-1, 1))
+            self.genes[self.next_node_id] = ('hidden', self._choice(['relu', 'sigmoid', 'tanh']), innovation_number, float(self._rng.uniform(-1, 1)))
             self.next_node_id += 1
 
         # Create output nodes with random bias
         self.output_nodes = []
         for _ in range(num_outputs):
             innovation_number = innovation_manager.create_innovation("gene", self.next_node_id, None)
-            self.genes[self.next_node_id] = ('output', 'identity', innovation_number, random.uniform(-1, 1))
+            self.genes[self.next_node_id] = ('output', 'identity', innovation_number, float(self._rng.uniform(-1, 1)))
             self.output_nodes.append(self.next_node_id)
             self.next_node_id += 1
 
         # Create some initial random connections with innovation numbers
+        node_ids = list(self.genes.keys())
         for i in range(num_inputs + initial_hidden_nodes):
-            out_node = random.choice(list(self.genes.keys()))
+            out_node = self._choice(node_ids)
             if self.genes[i][0] != 'output' and self.genes[out_node][0] != 'input' and i != out_node:
                 innovation_number = innovation_manager.create_innovation("connection", i, out_node)
-                self.connections[(i, out_node, innovation_number)] = random.uniform(-1, 1)
+                self.connections[(i, out_node, innovation_number)] = float(self._rng.uniform(-1, 1))
+
+    def __getstate__(self):
+        """Drops the derived indexes from the pickled state."""
+        state = self.__dict__.copy()
+        for attr in self._CACHE_ATTRS:
+            state.pop(attr, None)
+        return state
+
+    def __setstate__(self, state):
+        """Restores a pickled genome; derived indexes are rebuilt on first use."""
+        self.__dict__.update(state)
+        if '_rng' not in state:  # Pickled before genomes had their own Generator
+            self._rng = np.random.default_rng(random.getrandbits(64))
+        self._invalidate_caches()
+
+    def _choice(self, options):
+        """Returns a uniformly random element of a non-empty sequence using the genome's Generator."""
+        return options[self._rng.integers(len(options))]
+
+    def _invalidate_caches(self):
+        """Discards the derived indexes. Must be called whenever genes or connections change."""
+        for attr in self._CACHE_ATTRS:
+            setattr(self, attr, None)
+
+    def _edge_index(self):
+        """
+        Returns the per-node connection index, rebuilding it if it is stale.
+
+        Returns
+        -------
+        tuple[dict, dict]
+            ({node_id: [incoming connection keys]}, {node_id: [outgoing connection keys]}),
+            each list in the insertion order of `self.connections`.
+        """
+        if self._in_edges is None:
+            in_edges = defaultdict(list)
+            out_edges = defaultdict(list)
+            for key in self.connections:
+                out_edges[key[0]].append(key)
+                in_edges[key[1]].append(key)
+            self._in_edges = dict(in_edges)
+            self._out_edges = dict(out_edges)
+        return self._in_edges, self._out_edges
+
+    def _node_arrays(self):
+        """
+        Returns the genes as flat arrays (structure of arrays), rebuilding them if they are stale.
+
+        Returns
+        -------
+        dict
+            'ids', 'types' (`_NODE_TYPE_IDS`), 'activations' (`_ACTIVATION_IDS`), 'innovations'
+            and 'biases' (0 for input nodes), all aligned with the insertion order of
+            `self.genes`, plus 'index': {node_id: position in those arrays} and
+            'unique_innovations': the gene innovations sorted and without repeats.
+        """
+        if self._nodes is None:
+            num_nodes = len(self.genes)
+            gene_infos = self.genes.values()
+            self._nodes = {
+                'ids': np.fromiter(self.genes.keys(), dtype=np.int64, count=num_nodes),
+                'types': np.fromiter((self._NODE_TYPE_IDS[gene_info[0]] for gene_info in gene_infos), dtype=np.int8, count=num_nodes),
+                'activations': np.fromiter((self._ACTIVATION_IDS.get(gene_info[1], 0) for gene_info in gene_infos), dtype=np.int8, count=num_nodes),
+                'innovations': np.fromiter((gene_info[2] for gene_info in gene_infos), dtype=np.int64, count=num_nodes),
+                'biases': np.fromiter((gene_info[3] if len(gene_info) > 3 else 0.0 for gene_info in gene_infos), dtype=np.float64, count=num_nodes),
+                'index': {node_id: position for position, node_id in enumerate(self.genes)},
+            }
+            self._nodes['unique_innovations'] = np.unique(self._nodes['innovations'])
+        return self._nodes
+
+    def _connection_arrays(self):
+        """
+        Returns the connections as flat arrays sorted by innovation number, rebuilding them if
+        they are stale.
+
+        Returns
+        -------
+        dict
+            'sources', 'targets', 'innovations' and 'weights', aligned and ordered by innovation,
+            plus 'rows': the row of each connection in the insertion order of `self.connections`,
+            and 'first': the position of the first connection (in insertion order) of each distinct
+            innovation. Connection keys are (in, out, innovation), so an innovation can repeat.
+        """
+        if self._connection_soa is None:
+            num_connections = len(self.connections)
+            keys = self.connections.keys()
+            innovations = np.fromiter((key[2] for key in keys), dtype=np.int64, count=num_connections)
+            order = np.argsort(innovations, kind='stable')
+            rows = np.empty(num_connections, dtype=np.int64)
+            rows[order] = np.arange(num_connections)
+            sorted_innovations = innovations[order]
+            self._connection_soa = {
+                'sources': np.fromiter((key[0] for key in keys), dtype=np.int64, count=num_connections)[order],
+                'targets': np.fromiter((key[1] for key in keys), dtype=np.int64, count=num_connections)[order],
+                'innovations': sorted_innovations,
+                'weights': np.fromiter(self.connections.values(), dtype=np.float64, count=num_connections)[order],
+                'rows': rows,
+                # The sort is stable, so the first of each run of equal innovations was inserted first
+                'first': np.flatnonzero(np.diff(sorted_innovations, prepend=sorted_innovations[:1] - 1)),
+            }
+
+        return self._connection_soa
+
+    def _get_nodes_by_type(self):
+        """
+        Returns {'input': [...], 'hidden': [...], 'output': [...]} with the node IDs of each type
+        in gene order, cached until the genome changes. Callers must not modify the lists.
+        """
+        if self._nodes_by_type is None:
+            nodes_by_type = {'input': [], 'hidden': [], 'output': []}
+            for node_id, gene_info in self.genes.items():
+                nodes_by_type.setdefault(gene_info[0], []).append(node_id)
+            self._nodes_by_type = nodes_by_type
+        return self._nodes_by_type
+
+    def _get_connection_candidates(self):
+        """
+        Returns (possible_in_nodes, possible_out_nodes): the nodes that can start a connection
+        (input and hidden) and the ones that can end one (hidden and output), cached until the
+        genome changes. Callers must not modify the lists.
+        """
+        if self._connection_candidates is None:
+            nodes_by_type = self._get_nodes_by_type()
+            self._connection_candidates = (nodes_by_type['input'] + nodes_by_type['hidden'],
+                                           nodes_by_type['hidden'] + nodes_by_type['output'])
+        return self._connection_candidates
+
+    def _get_input_nodes(self):
+        """Returns the IDs of the input nodes in gene order, cached until the genome changes."""
+        return self._get_nodes_by_type()['input']
+
+    def _structural_key(self):
+        """
+        Returns a hashable key that identifies the genome's structure and parameters. Cached
+        until the genome changes.
+
+        The key also seeds the initialization of the genome's network (`_network_seed`), so two
+        genomes with the same key get the same network and, on the same data, the same fitness.
+        """
+        if self._structural_key_cached is None:
+            self._structural_key_cached = (tuple(sorted(self.genes.items())), tuple(sorted(self.connections.items())),
+                                           tuple(self.output_nodes))
+        return self._structural_key_cached
+
+    def structural_hash(self) -> int:
+        """
+        Returns a non-negative 63-bit digest of `_structural_key`: the genome's genes, connections
+        (with their weights) and outputs. Cached together with the key. It uses blake2b instead of
+        hash(), which is salted per process, so it is the same in every process and run.
+        """
+        if self._structural_hash_cached is None:
+            digest = hashlib.blake2b(repr(self._structural_key()).encode(), digest_size=8).digest()
+            self._structural_hash_cached = int.from_bytes(digest, 'little') & 0x7FFFFFFFFFFFFFFF
+        return self._structural_hash_cached
+
+    def _network_seed(self) -> int:
+        """
+        Returns the seed for the weights of the genome's network that the genome does not set:
+        its `structural_hash`, so that it is the same in every process.
+        """
+        return self.structural_hash()
 
     def add_node(self, new_type: str, activation: str = 'relu', innovation_number: int = None):
         """Se agrega un nuevo nodo"""
         if innovation_number is None:
             raise ValueError("Innovation number must be provided when adding a node.")
-        initial_bias = random.uniform(-1, 1) if new_type != 'input' else 0
+        initial_bias = float(self._rng.uniform(-1, 1)) if new_type != 'input' else 0
         self.genes[self.next_node_id] = (new_type, activation, innovation_number, initial_bias)
         self.next_node_id += 1
+        self._invalidate_caches()
         return self.next_node_id - 1
 
     def add_connection(self, in_node_id: int, out_node_id: int, weight: float = None, innovation_number: int = None):
@@ -474,47 +822,86 @@ class FeedforwardGenome:
         if (in_node_id, out_node_id, innovation_number) not in self.connections:
             if innovation_number is None:
                 raise ValueError("Innovation number must be provided when adding a connection.")
-            self.connections[(in_node_id, out_node_id, innovation_number)] = weight if weight is not None else random.uniform(-1, 1)
+            self.connections[(in_node_id, out_node_id, innovation_number)] = weight if weight is not None else float(self._rng.uniform(-1, 1))
+            self._invalidate_caches()
             return True
         return False
 
-    def evaluate_genome(self, graph_data: List[tuple[torch.Tensor, torch.Tensor]]):
+    def evaluate_genome(self, graph_data: List[tuple[torch.Tensor, torch.Tensor]], low_precision: bool = False):
         """Evalúa el fitness de este genoma en un conjunto de datos."""
-        total_loss = 0.0
-        for features, target in graph_data:
-            network = self.create_pytorch_network(num_inputs=features.shape[0])
-            network.eval()
-            with torch.no_grad():
-                prediction = network(features.unsqueeze(0))
-                loss = log_mse_loss(prediction.squeeze(), target)
-                total_loss += loss.item()
-        self.fitness = -total_loss / len(graph_data)
+        features, targets = _stack_graph_data(graph_data)
+        return self.evaluate_batch(features, targets, low_precision=low_precision)
+
+    def evaluate_batch(self, features: torch.Tensor, targets: torch.Tensor, low_precision: bool = False):
+        """
+        Evalúa el fitness de este genoma con todas las muestras apiladas en un solo forward.
+
+        features tiene forma (N, num_inputs) y targets un valor por muestra, tal como los
+        devuelve `_stack_graph_data`. Con low_precision=True el forward se ejecuta en bfloat16
+        (el fitness solo se usa para ordenar genomas); la pérdida se calcula siempre en float32.
+        Los pesos del genoma, ya plegados, se escriben en la red compilada del hilo
+        (`_compiled_network`), sin construir una ModifiableNet por genoma.
+        """
+        num_inputs = features.shape[1]
+        network, compiled_network = _compiled_network(num_inputs)
+        self._fill_network_weights(network.fc1.weight, network.fc2.weight, network.fc3.weight,
+                                   scale=_FRESH_BATCHNORM_SCALE)
+        with torch.inference_mode():
+            with torch.autocast(features.device.type, dtype=torch.bfloat16, enabled=low_precision):
+                predictions = compiled_network(features)
+            # La media sobre el lote equivale a promediar la pérdida de cada muestra
+            loss = log_mse_loss(predictions.float().reshape(targets.shape), targets)
+        self.fitness = -loss.item()
         return self.fitness
 
     def mutate_weights(self, mutation_rate: float, weight_mutation_power: float = 0.1):
         """Mutates the weights of the connections."""
-        for connection in self.connections:
-            if random.random() < mutation_rate:
-                self.connections[connection] += random.uniform(-weight_mutation_power, weight_mutation_power)
+        connections = list(self.connections)
+        # Una sola extracción para todas las conexiones en vez de dos llamadas a random por conexión
+        mutated = np.flatnonzero(self._rng.random(len(connections)) < mutation_rate)
+        if mutated.size:
+            deltas = self._rng.uniform(-weight_mutation_power, weight_mutation_power, mutated.size)
+            for position, delta in zip(mutated.tolist(), deltas.tolist()):
+                self.connections[connections[position]] += delta
+            # Only weights changed: the topology views stay valid and the connection arrays are
+            # updated row by row; the forward plan bakes the weights in, so it is rebuilt
+            if self._connection_soa is not None:
+                self._connection_soa['weights'][self._connection_soa['rows'][mutated]] = [
+                    self.connections[connections[position]] for position in mutated.tolist()]
+            self._plan = None
+            self._structural_key_cached = None
+            self._structural_hash_cached = None
 
     def mutate_biases(self, mutation_rate: float, bias_mutation_power: float = 0.1):
         """Mutates the bias of the nodes (excluding input nodes)."""
-        for node_id, gene_info in self.genes.items():
-            if gene_info[0] != 'input' and len(gene_info) > 3 and random.random() < mutation_rate:
-                activation, innovation, bias = gene_info[1], gene_info[2], gene_info[3]
-                self.genes[node_id] = (gene_info[0], activation, innovation, bias + random.uniform(-bias_mutation_power, bias_mutation_power))
+        nodes = self._node_arrays()
+        candidates = nodes['types'] != self._NODE_TYPE_IDS['input']
+        mutated = np.flatnonzero(candidates & (self._rng.random(len(nodes['ids'])) < mutation_rate))
+        if mutated.size:
+            nodes['biases'][mutated] += self._rng.uniform(-bias_mutation_power, bias_mutation_power, mutated.size)
+            for node_id, bias in zip(nodes['ids'][mutated].tolist(), nodes['biases'][mutated].tolist()):
+                gene_info = self.genes[node_id]
+                self.genes[node_id] = (gene_info[0], gene_info[1], gene_info[2], bias)
+            # Only biases changed: the topology views stay valid and the forward plan is
+            # patched in place instead of being rebuilt
+            if self._plan is not None:
+                self._plan['node_biases'][:] = nodes['biases'][self._plan['gene_positions']]
+            self._structural_key_cached = None
+            self._structural_hash_cached = None
+
 
     def mutate_add_node(self, possible_in_nodes, possible_out_nodes, innovation_manager: 'InnovationManager'):
         """Adds a new hidden node by splitting an existing connection."""
         if self.connections:
-            connection_to_split = random.choice(list(self.connections.keys()))
+            connection_to_split = self._choice(list(self.connections.keys()))
             weight = self.connections.pop(connection_to_split)
+            self._invalidate_caches()
             in_node, out_node, original_innovation = connection_to_split
 
             new_node_id = self.next_node_id
             self.next_node_id += 1
             new_node_innovation = innovation_manager.create_innovation("gene", new_node_id, None)
-            self.add_node('hidden', random.choice(['relu', 'sigmoid', 'tanh']), new_node_innovation)
+            self.add_node('hidden', self._choice(['relu', 'sigmoid', 'tanh']), new_node_innovation)
 
             # Create the new connections
             innovation_in_to_new = innovation_manager.create_innovation("connection", in_node, new_node_id)
@@ -526,8 +913,8 @@ class FeedforwardGenome:
     def mutate_add_connection(self, possible_in_nodes, possible_out_nodes, innovation_manager: 'InnovationManager'):
         """Adds a new connection between two previously unconnected nodes."""
         if possible_in_nodes and possible_out_nodes:
-            in_node = random.choice(possible_in_nodes)
-            out_node = random.choice(possible_out_nodes)
+            in_node = self._choice(possible_in_nodes)
+            out_node = self._choice(possible_out_nodes)
 
             # Ensure we don't create a connection that already exists
             connection_exists = any((in_n, out_n) == (in_node, out_node) for in_n, out_n, _ in self.connections.keys())
@@ -540,200 +927,325 @@ class FeedforwardGenome:
         """Elimina un nodo oculto y sus conexiones.
             """
         #Se piden los nodos ocultos del genoma.
-        hidden_nodes = [node_id for node_id, info in self.genes.items() if info[0] == 'hidden']
+        hidden_nodes = list(self._get_nodes_by_type()['hidden'])
         #si no hay, no se hace nada
         if not hidden_nodes:
             return 
             
         #Se mezclan los noodos ocultos para obtener al azar un nodo oculto
-        random.shuffle(hidden_nodes)
+        self._rng.shuffle(hidden_nodes)
+        in_edges, out_edges = self._edge_index()
         #Por cada uno de los nodos ocultos
         for node_id in hidden_nodes:
             # Se piden las listas de las conexiones del nodo 
-            connected_in = [(in_node, out_node, innov) for (in_node, out_node, innov) in self.connections if out_node == node_id]
-            connected_out = [(in_node, out_node, innov) for (in_node, out_node, innov) in self.connections if in_node == node_id]
+            connected_in = in_edges.get(node_id, [])
+            connected_out = out_edges.get(node_id, [])
             
             for conn in connected_in + connected_out:
                 self.connections.pop(conn, None)
                 
             del self.genes[node_id]
+            self._invalidate_caches()
             
             return
        
     def mutate_eliminate_connection(self):
         """Safely eliminate a connection while preserving node connectivity."""
-        connections = list(self.connections.items())
-        random.shuffle(connections)
+        connections = list(self.connections)
+        self._rng.shuffle(connections)
+        # The genome is only modified once a removable connection is found, so the index stays valid
+        in_edges, out_edges = self._edge_index()
 
-        for (in_node, out_node, innov), _ in connections:
+        for in_node, out_node, innov in connections:
         
             if in_node not in self.genes or out_node not in self.genes:
                 continue
-            # Temporarily remove
-            backup_weight = self.connections.pop((in_node, out_node, innov))
 
-            # Recheck orphan status
-            in_has_other_outputs = any((n1 != in_node or n2 != out_node) and n1 == in_node for (n1, n2, _) in self.connections)
-            out_has_other_inputs = any((n1 != in_node or n2 != out_node) and n2 == out_node for (n1, n2, _) in self.connections)
+            # Would removal orphan a node? Only its own edges are inspected, not every connection
+            in_has_other_outputs = any(target != out_node for _, target, _ in out_edges.get(in_node, ()))
+            out_has_other_inputs = any(source != in_node for source, _, _ in in_edges.get(out_node, ()))
 
-            # If removal causes orphaning of a hidden node, revert
+            # If removal causes orphaning of a hidden node, keep it
             in_is_hidden = self.genes[in_node][0] == 'hidden'
             out_is_hidden = self.genes[out_node][0] == 'hidden'
 
             if (in_is_hidden and not in_has_other_outputs) or (out_is_hidden and not out_has_other_inputs):
-                self.connections[(in_node, out_node, innov)] = backup_weight  # Revert
-            else:
-                self.prune_orphan_nodes()
-                return  # Done
+                continue
+            del self.connections[(in_node, out_node, innov)]
+            self._invalidate_caches()
+            self.prune_orphan_nodes()
+            return  # Done
 
     def prune_orphan_nodes(self):
         """Elimina los nodos huérfanos que no tienen conexiones entrantes ni salientes."""
         orphan_nodes = []
+        in_edges, out_edges = self._edge_index()
 
         # Busca nodos sin conexiones entrantes ni salientes
         for node in list(self.genes.keys()):
             # Si el nodo no tiene conexiones entrantes ni salientes
-            if not any(n1 == node for (n1, n2, _) in self.connections) and \
-               not any(n2 == node for (n1, n2, _) in self.connections):
+            if node not in in_edges and node not in out_edges:
                 orphan_nodes.append(node)
 
-        # Elimina los nodos huérfanos
+        # Elimina los nodos huérfanos. Por definición no tienen conexiones en el índice,
+        # así que no hay que reconstruir self.connections para cada uno
         for orphan in orphan_nodes:
             del self.genes[orphan]  # Elimina el nodo de los genes
-            # También elimina las conexiones asociadas al nodo huérfano
-            self.connections = {key: value for key, value in self.connections.items() if key[0] != orphan and key[1] != orphan}
+        if orphan_nodes:
+            self._invalidate_caches()
 
     def prune_disconnected_inputs(self):
         """Ensures all input nodes are connected to at least one other node."""
-        input_nodes = [node_id for node_id, info in self.genes.items() if info[0] == 'input']
         connected_sources = set(in_node for (in_node, _, _) in self.connections)
 
-        for input_node in input_nodes:
+        nodes_by_type = self._get_nodes_by_type()  # add_connection no cambia los nodos
+        targets = nodes_by_type['hidden'] + nodes_by_type['output']
+        for input_node in nodes_by_type['input']:
             if input_node not in connected_sources:
                 # Attempt reconnection — connect to a random hidden or output node
-                targets = [node_id for node_id, info in self.genes.items() if info[0] in ('hidden', 'output')]
                 if not targets:
                     continue
-                target = random.choice(targets)
+                target = self._choice(targets)
                 innov = self.innovation_manager.create_innovation("connection", input_node, target)
                 self.add_connection(input_node, target, innovation_number=innov)
 
 
+    def _topological_order(self):
+        """
+        Returns the non-input nodes in a topological order of the connection graph, cached
+        until the genome changes.
+
+        Kahn's algorithm seeded in ID order; nodes left over because they sit on a cycle are
+        appended in ID order so every node still gets evaluated.
+        """
+        if self._topo is not None:
+            return self._topo
+        in_edges, out_edges = self._edge_index()
+        nodes = self._node_arrays()
+        hidden_and_outputs = np.sort(nodes['ids'][nodes['types'] != self._NODE_TYPE_IDS['input']]).tolist()
+        pending = dict.fromkeys(hidden_and_outputs, 0)
+        for node_id in hidden_and_outputs:
+            for connection in in_edges.get(node_id, ()):
+                if connection[0] in pending:
+                    pending[node_id] += 1
+        ready = deque(node_id for node_id in hidden_and_outputs if pending[node_id] == 0)
+        order = []
+        while ready:
+            node_id = ready.popleft()
+            order.append(node_id)
+            for connection in out_edges.get(node_id, ()):
+                target = connection[1]
+                if target in pending:
+                    pending[target] -= 1
+                    if pending[target] == 0:
+                        ready.append(target)
+        if len(order) < len(hidden_and_outputs):
+            visited = set(order)
+            order.extend(node_id for node_id in hidden_and_outputs if node_id not in visited)
+        self._topo = order
+        return self._topo
+
+    def _forward_plan(self):
+        """
+        Returns the layered evaluation plan used by `activate`, rebuilding it if it is stale.
+
+        Nodes are grouped into layers whose members only read from earlier layers, so a
+        whole layer is evaluated with one matrix-vector product. Input nodes come first,
+        the rest are visited in `_topological_order`; only connections from nodes evaluated
+        earlier in that order (i.e. not closing a cycle) contribute to a node.
+
+        Returns
+        -------
+        dict
+            'size': number of evaluated nodes, 'num_inputs': number of input rows,
+            'layers': list of (start, stop, weights, biases, activation_groups) where rows
+            start:stop are computed from rows :start, 'output_rows': row of each
+            output node (None if the node no longer exists), 'kernel_args': the same
+            network as flat CSR arrays for `_activate_kernel`, and 'node_biases' /
+            'gene_positions': the bias of each non-input row (shared by 'layers' and
+            'kernel_args') and its position in `_node_arrays`.
+        """
+        if self._plan is not None:
+            return self._plan
+        in_edges, _ = self._edge_index()
+        nodes = self._node_arrays()
+        input_nodes = self._get_input_nodes()
+
+        # Depth of each node = 1 + depth of its deepest contributing source
+        depth = {node_id: 0 for node_id in input_nodes}
+        sources = {}
+        for node_id in self._topological_order():
+            sources[node_id] = [connection for connection in in_edges.get(node_id, ()) if connection[0] in depth]
+            depth[node_id] = 1 + max((depth[connection[0]] for connection in sources[node_id]), default=0)
+
+        layer_nodes = defaultdict(list)
+        for node_id in sources:
+            layer_nodes[depth[node_id]].append(node_id)
+        order = input_nodes + [node_id for level in sorted(layer_nodes) for node_id in layer_nodes[level]]
+        row = {node_id: index for index, node_id in enumerate(order)}
+
+        gene_positions = np.array([nodes['index'][node_id] for node_id in order[len(input_nodes):]], dtype=np.int64)
+        node_biases = nodes['biases'][gene_positions]
+        node_activations = nodes['activations'][gene_positions]
+
+        layers = []
+        # CSR view: incoming edges of the k-th non-input row live in edge_*[indptr[k]:indptr[k+1]]
+        indptr = [0]
+        edge_sources = []
+        edge_weights = []
+        start = len(input_nodes)
+        for level in sorted(layer_nodes):
+            layer = layer_nodes[level]
+            weights = np.zeros((len(layer), start))
+            biases = node_biases[start - len(input_nodes):start - len(input_nodes) + len(layer)]
+            groups = defaultdict(list)
+            for position, node_id in enumerate(layer):
+                for connection in sources[node_id]:
+                    weights[position, row[connection[0]]] += self.connections[connection]
+                    edge_sources.append(row[connection[0]])
+                    edge_weights.append(self.connections[connection])
+                indptr.append(len(edge_sources))
+                activation = self.genes[node_id][1]
+                if activation in self._ACTIVATIONS:
+                    groups[activation].append(position)
+            activation_groups = [(self._ACTIVATIONS[name], np.array(positions)) for name, positions in groups.items()]
+            layers.append((start, start + len(layer), weights, biases, activation_groups))
+            start += len(layer)
+
+        output_rows = [row.get(node_id) for node_id in self.output_nodes]
+        self._plan = {
+            'size': len(order),
+            'num_inputs': len(input_nodes),
+            'layers': layers,
+            'output_rows': output_rows,
+            'node_biases': node_biases,
+            'gene_positions': gene_positions,
+            'kernel_args': (
+                np.array(indptr, dtype=np.int64),
+                np.array(edge_sources, dtype=np.int64),
+                np.array(edge_weights, dtype=np.float64),
+                node_biases,
+                node_activations,
+                np.array([-1 if output_row is None else output_row for output_row in output_rows], dtype=np.int64),
+            ),
+        }
+        return self._plan
+
     def activate(self, inputs):
         """Activates the neural network based on the genome with bias."""
         if len(inputs) != self.get_num_inputs():
             raise ValueError("Number of inputs must match the number of input nodes.")
 
-        node_values = {}
+        plan = self._forward_plan()
+        if _NUMBA_AVAILABLE:
+            return _activate_kernel(*plan['kernel_args'], np.asarray(inputs, dtype=np.float64)).tolist()
+
+        values = np.zeros(plan['size'])
         # Set input node values
-        input_nodes = {node_id: index for index, (node_id, gene_info) in enumerate(self.genes.items()) if gene_info[0] == 'input'}
-        for node_id, input_index in input_nodes.items():
-            node_values[node_id] = inputs[input_index]
-
-        # Activate nodes based on connections
-        sorted_nodes = sorted(self.genes.keys()) # Process nodes in order of their ID
-        for node_id in sorted_nodes:
-            if self.genes[node_id][0] != 'input':
-                incoming_sum = 0
-                for (in_node, out_node, _), weight in self.connections.items():
-                    if out_node == node_id and in_node in node_values:
-                        incoming_sum += node_values[in_node] * weight
-
-                # Add bias
-                bias = self.genes[node_id][3] if len(self.genes[node_id]) > 3 else 0
-                incoming_sum += bias
-
-                activation_type = self.genes[node_id][1]
-                if activation_type == 'relu':
-                    node_values[node_id] = max(0, incoming_sum)
-                elif activation_type == 'sigmoid':
-                    node_values[node_id] = 1 / (1 + torch.exp(-torch.tensor(incoming_sum))).item()
-                elif activation_type == 'tanh':
-                    node_values[node_id] = torch.tanh(torch.tensor(incoming_sum)).item()
-                elif activation_type == 'identity':
-                    node_values[node_id] = incoming_sum
+        values[:plan['num_inputs']] = inputs
+
+        # Activate one layer at a time: every node in a layer only depends on earlier rows
+        for start, stop, weights, biases, activation_groups in plan['layers']:
+            incoming_sum = weights @ values[:start] + biases
+            for activation, positions in activation_groups:
+                incoming_sum[positions] = activation(incoming_sum[positions])
+            values[start:stop] = incoming_sum
 
         # Collect output node values
-        output_values = [node_values.get(node_id, 0) for node_id in self.output_nodes]
+        output_values = [float(values[row]) if row is not None else 0 for row in plan['output_rows']]
         return output_values
 
-    def create_pytorch_network(self, num_inputs: int):
-        class ModifiableNet(nn.Module):
-            def __init__(self, num_inputs):
-                super().__init__()
-                self.fc1 = nn.Linear(num_inputs, 64)
-                self.bn1 = nn.BatchNorm1d(64)
-                self.relu1 = nn.ReLU()
-                self.fc2 = nn.Linear(64, 32)
-                self.bn2 = nn.BatchNorm1d(32)
-                self.relu2 = nn.ReLU()
-                self.fc3 = nn.Linear(32, 1)
-                self._initialize_weights()
-
-            def _initialize_weights(self):
-                for m in self.modules():
-                    if isinstance(m, nn.Linear):
-                        nn.init.xavier_uniform_(m.weight)
-                        nn.init.zeros_(m.bias) # Biases are initialized to zero here
-                    elif isinstance(m, nn.BatchNorm1d):
-                        nn.init.ones_(m.weight)
-                        nn.init.zeros_(m.bias)
-
-            def forward(self, x):
-                x = self.fc1(x)
-                x = self.bn1(x)
-                x = self.relu1(x)
-                x = self.fc2(x)
-                x = self.bn2(x)
-                x = self.relu2(x)
-                x = self.fc3(x)
-                return x
+    def create_pytorch_network(self, num_inputs: int, dtype: torch.dtype = torch.float32):
+        """
+        Builds a ModifiableNet whose fc1 weights come from the genome's input connections.
+
+        The weights are written by `_fill_network_weights`, so the same genome always gets the
+        same network (and the same fitness), in any process.
 
+        dtype casts the whole network, BatchNorm running statistics included (e.g. torch.bfloat16
+        for cheaper fitness-only inference); inputs must then be cast to the same dtype.
+        """
         model = ModifiableNet(num_inputs)
+        self._fill_network_weights(model.fc1.weight, model.fc2.weight, model.fc3.weight)
+        return model.to(dtype)
+
+    def _fill_network_weights(self, fc1: torch.Tensor, fc2: torch.Tensor, fc3: torch.Tensor, scale: float = 1.0):
+        """
+        Writes the weights of the genome's ModifiableNet into fc1, fc2 and fc3, (out, in) float32
+        weight matrices, in place and without building the module. The network biases are zero.
 
+        All weights are drawn with Xavier uniform from a generator seeded with `_network_seed`;
+        the genome's input -> node connections then overwrite their fc1 positions. scale multiplies
+        fc1 and fc2 at the end: `_FRESH_BATCHNORM_SCALE` gives the weights after `fold_batchnorm`.
+        """
+        generator = torch.Generator().manual_seed(self._network_seed())
         with torch.no_grad():
-            input_nodes = {node_id for node_id, gene_info in self.genes.items() if gene_info[0] == 'input'}
-            hidden_nodes = {node_id for node_id, gene_info in self.genes.items() if gene_info[0] == 'hidden'}
-            output_nodes = {node_id for node_id, gene_info in self.genes.items() if gene_info[0] == 'output'}
+            for weight in (fc1, fc2, fc3):
+                nn.init.xavier_uniform_(weight, generator=generator)
+
+            # Only input -> node connections are projected (onto fc1); hidden -> fc2 and
+            # * -> output connections have no mapping yet
+            connection_arrays = self._connection_arrays()
+            nodes = self._node_arrays()
+            insertion_order = np.argsort(connection_arrays['rows'])
+            sources = connection_arrays['sources'][insertion_order]
+            targets = connection_arrays['targets'][insertion_order]
+            num_rows, num_cols = fc1.shape
+            input_ids = nodes['ids'][nodes['types'] == self._NODE_TYPE_IDS['input']]
+            projected = np.isin(sources, input_ids) & (targets >= 0) & (targets < num_rows) & (sources >= 0) & (sources < num_cols)
+            positions = (targets * num_cols + sources)[projected]
+            weights = connection_arrays['weights'][insertion_order][projected] * 0.1
+            # Later duplicates of an (out, in) position overwrite earlier ones: the last weight is kept
+            _, last_reversed = np.unique(positions[::-1], return_index=True)
+            keep = positions.size - 1 - last_reversed
+            fc1.view(-1)[torch.from_numpy(positions[keep])] = torch.from_numpy(weights[keep]).to(fc1.dtype)
+
+            if scale != 1.0:
+                fc1.mul_(scale)
+                fc2.mul_(scale)
 
-            for (in_node, out_node, _), weight in self.connections.items():
-                if in_node in input_nodes and out_node < 64:
-                    if 0 <= out_node < model.fc1.out_features and 0 <= in_node < model.fc1.in_features:
-                        model.fc1.weight[out_node, in_node] = weight * 0.1
-                elif in_node in hidden_nodes and 64 <= out_node < 96: # Roughly map to fc2
-                    pass
-                elif in_node in (hidden_nodes | input_nodes) and out_node in output_nodes:
-                    pass
+    def copy(self):
+        """
+        Creates an independent copy of the FeedforwardGenome with bias.
 
-        return model
+        Gene and connection values are immutable tuples/floats, so copying the dicts is enough;
+        the constructor is skipped because it would build (and register innovations for) a
+        network that is immediately replaced.
 
-    def copy(self):
-        """Creates a deep copy of the FeedforwardGenome with bias."""
-        new_genome = FeedforwardGenome(
-            genome_id=self.genome_id,
-            num_inputs=self.get_num_inputs(),
-            num_outputs=self.get_num_outputs(),
-            innovation_manager=self.innovation_manager,
-            initial_hidden_nodes=0
-        )
-        new_genome.genes = copy.deepcopy(self.genes)
-        new_genome.connections = copy.deepcopy(self.connections)
+        The copy is a separate genome (it is mutated on its own), so it gets a new genome_id from
+        the innovation manager. Without one (e.g. in an evaluation worker) it keeps the original ID.
+        """
+        new_genome = FeedforwardGenome.__new__(FeedforwardGenome)
+        if self.innovation_manager is not None:
+            new_genome.genome_id = self.innovation_manager.next_genome_id()
+            self.innovation_manager.increment_genome_id()
+        else:
+            new_genome.genome_id = self.genome_id
+        new_genome.genes = self.genes.copy()
+        new_genome.connections = self.connections.copy()
         new_genome.next_node_id = self.next_node_id
         new_genome.fitness = self.fitness
-        new_genome.output_nodes = copy.deepcopy(self.output_nodes)
+        new_genome.innovation_manager = self.innovation_manager
+        new_genome.output_nodes = list(self.output_nodes)
+        new_genome._rng = np.random.default_rng(random.getrandbits(64))
+        new_genome._invalidate_caches()
         return new_genome
 
     def get_num_inputs(self):
-        return sum(1 for _, gene_info in self.genes.items() if gene_info[0] == 'input')
+        return len(self._get_input_nodes())
 
     def get_num_outputs(self):
         return len(self.output_nodes)
 
     def get_num_hidden_nodes(self):
-        return sum(1 for _, gene_info in self.genes.items() if gene_info[0] == 'hidden')
+        return len(self._get_nodes_by_type()['hidden'])
 
     def visualize_network2(self):
         """Visualizes the neural network structure using NetworkX and Matplotlib with bias info."""
+        # Imported here so that evaluation-only runs (and worker processes) do not load them
+        import networkx as nx
+        import matplotlib.pyplot as plt
+
         G = nx.DiGraph()
 
         # Add nodes to the graph
@@ -762,7 +1274,7 @@ class FeedforwardGenome:
         colors = [node_colors[data['type']] for node, data in G.nodes(data=True)]
 
         # Define layout for the graph 
-        pos = nx.spring_layout(G)
+        pos = _network_layout(tuple(G.nodes), tuple(G.edges), 'spring')
 
         # Draw the nodes
         nx.draw_networkx_nodes(G, pos, node_color=colors, node_size=800)
@@ -781,6 +1293,9 @@ class FeedforwardGenome:
         
     def visualize_network(self):
         """Visualizes the neural network structure using NetworkX and Graphviz layout with bias info."""
+        import networkx as nx
+        import matplotlib.pyplot as plt
+
         G = nx.DiGraph()
 
         # Add nodes to the graph
@@ -810,7 +1325,7 @@ class FeedforwardGenome:
 
         # Graphviz layout (hierarchical)
         try:
-            pos = nx.nx_agraph.graphviz_layout(G, prog='dot', args='-Grankdir=LR')  # Left-to-right layout
+            pos = _network_layout(tuple(G.nodes), tuple(G.edges), 'dot')
         except:
             print("Error: Asegúrate de tener pygraphviz instalado correctamente.")
             return
@@ -863,6 +1378,10 @@ class Population:
         Devuelve el mejor genoma según el fitness más alto.
     get_best_fitness():
         Devuelve el mejor fitness
+    close():
+        Cierra el conjunto de procesos de evaluación y los evaluadores de Ray.
+    __enter__() / __exit__():
+        Permiten usar la población en un bloque `with`, que llama a close() al salir.
     __repr__():
         Devuelve una representación en cadena del gen.
     """
@@ -882,6 +1401,71 @@ class Population:
         self.best_genome = None
         self.best_fitness = -float('inf')
         self.innovation_manager = innovation_manager
+        self._executor = None  # Conjunto de procesos de evaluación, reutilizado entre generaciones
+        self._executor_workers = 0
+        self._executor_finalizer = None  # Cierra el conjunto de procesos si la población se destruye sin close()
+        self._process_pool_failed = False  # Si el conjunto de procesos falló, se pasa a hilos
+        self._ray_actors = []  # Evaluadores de Ray (backend='ray'), reutilizados entre generaciones
+        self._fitness_cache = OrderedDict()  # {clave estructural del genoma: fitness} en orden LRU, ver evaluate_fitness
+        self._fitness_cache_data = None
+        self._dataset = None  # Datos apilados de la última evaluación, ver _stack_dataset
+
+    def __getstate__(self):
+        """El conjunto de procesos de evaluación y los datos apilados no se serializan."""
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        state['_executor_workers'] = 0
+        state['_executor_finalizer'] = None
+        state['_ray_actors'] = []
+        state['_dataset'] = None
+        state['_fitness_cache_data'] = None  # Se refiere a los datos apilados, que no se guardan
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Cierra el conjunto de procesos de evaluación y los evaluadores de Ray, si se han creado."""
+        if getattr(self, '_executor', None) is not None:
+            if getattr(self, '_executor_finalizer', None) is not None:
+                self._executor_finalizer.detach()
+                self._executor_finalizer = None
+            self._executor.shutdown()
+            self._executor = None
+            self._executor_workers = 0
+        for actor in getattr(self, '_ray_actors', []):
+            ray.kill(actor)
+        self._ray_actors = []
+
+    def _get_executor(self, num_workers: int):
+        """
+        Devuelve el conjunto de procesos de evaluación, creándolo solo la primera vez (o si cambia
+        num_workers): arrancar los procesos e importar PyTorch en ellos cuesta más que una generación.
+
+        El conjunto se cierra con close() (o al salir de un bloque `with`); si no, al destruir la
+        población o al terminar el intérprete. Los procesos se crean con 'spawn', que no hereda el estado de hilos de PyTorch del proceso
+        padre. Si no se pueden crear procesos, o el conjunto de procesos ya falló una vez, se usa
+        un ThreadPoolExecutor.
+        """
+        if getattr(self, '_executor', None) is None or self._executor_workers != num_workers:
+            self.close()
+            self._executor = None
+            if not getattr(self, '_process_pool_failed', False):
+                try:
+                    self._executor = ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context('spawn'),
+                                                         initializer=_init_evaluation_worker)
+                except (OSError, NotImplementedError, ValueError) as error:
+                    warnings.warn(f"No se pudo crear el conjunto de procesos ({error}); se evaluará con hilos.")
+                    self._process_pool_failed = True
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=num_workers)
+            self._executor_workers = num_workers
+            # Si nadie llama a close(), los procesos se cierran al destruir la población o al salir del intérprete
+            self._executor_finalizer = weakref.finalize(self, self._executor.shutdown, wait=False)
+        return self._executor
 
     def create_initial_genome_population(self, num_inputs: int, num_outputs: int, initial_hidden_nodes: int = 8):
         """
@@ -918,22 +1502,174 @@ class Population:
         for _ in range(self.population_size):
             self.population.append(self.create_initial_genome_population(num_inputs, num_outputs, initial_hidden_nodes))
 
-    def evaluate_fitness(self, graph_data: List[tuple[torch.Tensor, torch.Tensor]]) -> None:
+    def evaluate_fitness(self, graph_data: List[tuple[torch.Tensor, torch.Tensor]], num_workers: Optional[int] = 1,
+                         backend: str = 'process', low_precision: bool = False) -> None:
         """
         Evalúa el fitness de cada genoma utilizando la función `evaluate_genome`.
+
+        Con backend='process' y num_workers > 1 los genomas se evalúan en paralelo en un conjunto de procesos,
+        ya que la evaluación de cada uno es independiente del resto. Con backend='vectorized'
+        toda la población se evalúa en un único forward con `evaluate_population`, en GPU si
+        hay una disponible. Con backend='ray' (requiere el paquete ray) se reparten entre
+        num_workers actores de Ray, que pueden estar en otras máquinas del clúster.
+
+        Los fitness se guardan por clave estructural del genoma, de modo que los genomas que
+        pasan sin cambios a la siguiente generación (la élite) no se vuelven a evaluar. La caché
+        se vacía si cambian los datos o la precisión, y guarda como mucho population_size * 4 genomas,
+        descartando primero los usados hace más tiempo.
         
         Attributes
         ----------
         graph_data (List[tuple[torch.Tensor, torch.Tensor]]): Datos de grafos utilizados para evaluar la aptitud.
-        """
+        num_workers (int, opcional): Número de procesos de evaluación. Por defecto es 1 (evaluación secuencial,
+            sin arrancar procesos); None usa todos los núcleos.
+        backend (str, opcional): 'process', 'vectorized' o 'ray'. Por defecto es 'process'.
+        low_precision (bool, opcional): Evalúa las redes en bfloat16. Por defecto es False.
+        """
+        num_workers = num_workers or os.cpu_count() or 1
+        if backend not in ('process', 'vectorized', 'ray'):
+            raise ValueError(f"Backend de evaluación desconocido: {backend}")
+        if backend == 'ray' and not _RAY_AVAILABLE:
+            raise ImportError("El backend 'ray' requiere el paquete ray (pip install ray).")
+        features, targets = self._stack_dataset(graph_data)
+
+        # Los datos apilados solo cambian si cambian los datos (ver _stack_dataset), y la población
+        # guarda una referencia, así que su id identifica los datos sin leerlos
+        data_key = (id(features), low_precision)
+        if data_key != self._fitness_cache_data or not isinstance(self._fitness_cache, OrderedDict):
+            self._fitness_cache = OrderedDict()
+            self._fitness_cache_data = data_key
+        keys = [genome._structural_key() for genome in self.population]
+        pending = {}  # Un genoma por clave no evaluada
+        for genome, key in zip(self.population, keys):
+            if key not in self._fitness_cache:
+                pending.setdefault(key, genome)
+        genomes = list(pending.values())
+
+        if not genomes:
+            fitnesses = []
+        elif backend == 'vectorized':
+            fitnesses = evaluate_population(genomes, features, targets, low_precision=low_precision)
+        elif backend == 'ray':
+            fitnesses = self._evaluate_with_ray(genomes, features, targets, num_workers, low_precision)
+        elif num_workers > 1 and len(genomes) > 1:
+            fitnesses = self._evaluate_in_pool(genomes, features, targets, num_workers, low_precision)
+        else:
+            fitnesses = [_evaluate_one(genome, features, targets, low_precision) for genome in genomes]
+        self._fitness_cache.update(zip(pending, fitnesses))
+
         self.fitness_scores = []
-        for genome in self.population:
-            genome.evaluate_genome(graph_data)
+        for genome, key in zip(self.population, keys):
+            genome.fitness = self._fitness_cache[key]
+            self._fitness_cache.move_to_end(key)
             self.fitness_scores.append(genome.fitness)
 
-            if genome.fitness > self.best_fitness:
-                self.best_fitness = genome.fitness
-                self.best_genome = genome
+        # El mejor se conserva entre generaciones (lo usa la parada temprana); ante empates,
+        # el primero de la población, como al comparar genoma a genoma
+        if self.population:
+            generation_best = max(self.population, key=lambda genome: genome.fitness)
+            if generation_best.fitness > self.best_fitness:
+                self.best_fitness = generation_best.fitness
+                self.best_genome = generation_best
+
+        while len(self._fitness_cache) > self.population_size * 4:
+            self._fitness_cache.popitem(last=False)  # El usado hace más tiempo
+
+    def _stack_dataset(self, graph_data: List[tuple[torch.Tensor, torch.Tensor]]) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Apila graph_data con `_stack_graph_data`, reutilizando los tensores apilados de la llamada
+        anterior si graph_data contiene los mismos tensores sin modificar.
+
+        Los tensores se comparan por identidad y por su contador de versión (`_version`), que
+        PyTorch incrementa con cada modificación en el sitio: no se copian ni se leen los datos,
+        para cualquier dtype y dispositivo. Se guarda una referencia a cada tensor, de modo que
+        su id no puede pasar a otro tensor mientras se compara.
+        """
+        samples = tuple(tensor for pair in graph_data for tensor in pair)
+        versions = tuple(tensor._version for tensor in samples)
+        dataset = getattr(self, '_dataset', None)
+        if (dataset is None or len(dataset[0]) != len(samples) or dataset[1] != versions
+                or any(cached is not sample for cached, sample in zip(dataset[0], samples))):
+            features, targets = _stack_graph_data(graph_data)
+            dataset = self._dataset = (samples, versions, features, targets)
+        return dataset[2], dataset[3]
+
+    def _evaluate_in_pool(self, genomes: List['FeedforwardGenome'], features: torch.Tensor, targets: torch.Tensor,
+
+                          num_workers: int, low_precision: bool = False) -> List[float]:
+        """
+        Evalúa los genomas en el conjunto de procesos de `_get_executor` y devuelve los fitness en el mismo orden.
+
+        Attributes
+        ----------
+        genomes (List[FeedforwardGenome]): Genomas a evaluar.
+        features (torch.Tensor): Características de los grafos apiladas, de forma (N, num_inputs).
+        targets (torch.Tensor): Valores objetivo apilados, uno por grafo.
+        num_workers (int): Número de procesos de evaluación.
+        low_precision (bool, opcional): Evalúa las redes en bfloat16.
+        """
+        # El InnovationManager es compartido y crece cada generación: no se envía a los procesos
+        innovation_managers = [genome.innovation_manager for genome in genomes]
+        for genome in genomes:
+            genome.innovation_manager = None
+        try:
+            executor = self._get_executor(num_workers)
+            evaluate = partial(_evaluate_one, features=features, targets=targets, low_precision=low_precision)
+            chunksize = max(1, len(genomes) // (4 * num_workers))
+            try:
+                return list(executor.map(evaluate, genomes, chunksize=chunksize))
+            except BrokenExecutor as error:
+                # Un proceso murió (p. ej. sin memoria): esta generación se termina en el proceso
+                # principal y las siguientes se evalúan con hilos
+                warnings.warn(f"El conjunto de procesos de evaluación falló ({error}); se evaluará con hilos.")
+                self.close()
+                self._process_pool_failed = True
+                return [_evaluate_one(genome, features, targets, low_precision) for genome in genomes]
+        finally:
+            for genome, innovation_manager in zip(genomes, innovation_managers):
+                genome.innovation_manager = innovation_manager
+
+    def _evaluate_with_ray(self, genomes: List['FeedforwardGenome'], features: torch.Tensor, targets: torch.Tensor,
+                           num_workers: int, low_precision: bool = False) -> List[float]:
+        """
+        Evalúa los genomas repartidos entre num_workers actores de Ray y devuelve los fitness en el mismo orden.
+
+        Los datos se suben una sola vez por generación al almacén de objetos de Ray, desde donde
+        todos los actores los leen sin copiarlos.
+
+        Attributes
+        ----------
+        genomes (List[FeedforwardGenome]): Genomas a evaluar.
+        features (torch.Tensor): Características de los grafos apiladas, de forma (N, num_inputs).
+        targets (torch.Tensor): Valores objetivo apilados, uno por grafo.
+        num_workers (int): Número de actores de evaluación.
+        low_precision (bool, opcional): Evalúa las redes en bfloat16.
+        """
+        if not ray.is_initialized():
+            ray.init(ignore_reinit_error=True)
+        if len(self._ray_actors) != num_workers:
+            self.close()
+            evaluator = ray.remote(_GenomeEvaluator)
+            self._ray_actors = [evaluator.remote() for _ in range(num_workers)]
+
+        # El InnovationManager es compartido y crece cada generación: no se envía a los actores
+        innovation_managers = [genome.innovation_manager for genome in genomes]
+        for genome in genomes:
+            genome.innovation_manager = None
+        try:
+            data = ray.put((features, targets))
+            chunks = [genomes[i::num_workers] for i in range(num_workers)]
+            results = ray.get([actor.evaluate.remote(chunk, data, low_precision)
+                               for actor, chunk in zip(self._ray_actors, chunks) if chunk])
+        finally:
+            for genome, innovation_manager in zip(genomes, innovation_managers):
+                genome.innovation_manager = innovation_manager
+
+        # Deshace el reparto intercalado de genomas entre actores
+        fitnesses = [0.0] * len(genomes)
+        for i, chunk_fitnesses in enumerate(results):
+            fitnesses[i::num_workers] = chunk_fitnesses
+        return fitnesses
 
     def select_genomes(self) -> List['FeedforwardGenome']:
         """
@@ -943,11 +1679,9 @@ class Population:
         --------
         List[FeedforwardGenome]: Los genomas seleccionados con mejor fitness.
         """
-        selected_genomes = []
-        sorted_population = sorted(self.population, key=lambda genome: genome.fitness, reverse=True)
         num_selected = max(1, self.population_size // 5) # Keep at least one
-        selected_genomes.extend(sorted_population[:num_selected])
-        return selected_genomes
+        # Equivale a sorted(..., reverse=True)[:num_selected] (mismo orden ante empates) sin ordenar toda la población
+        return heapq.nlargest(num_selected, self.population, key=lambda genome: genome.fitness)
 
     def reproduce_and_mutate(self, population_size: int, mutation_rate: float,
                              crossover_function: Callable[['FeedforwardGenome', 'FeedforwardGenome', 'InnovationManager'], 'FeedforwardGenome'],
@@ -1006,7 +1740,7 @@ class InnovationManager:
     Attributes
     ----------
     innovations : dict
-        Diccionario para almacenar las innovaciones existentes.
+        Diccionario para almacenar las innovaciones existentes, indexado por `_innovation_key`.
     next_innovation_number: int
         Contador para el próximo número de innovación disponible.
     fitness_scores: List
@@ -1025,6 +1759,12 @@ class InnovationManager:
     increment_genome_id():
         Actualiza el id disponible.
     """
+    # Las claves (tipo, id_entrada, id_salida) se empaquetan en un solo entero: 8 bits de tipo
+    # y 24 bits por ID, con el valor máximo reservado para un ID ausente (None)
+    _INNOVATION_TYPE_CODES = {'gene': 0, 'connection': 1, 'node': 2}
+    _ID_BITS = 24
+    _NO_ID = (1 << 24) - 1
+
     def __init__(self):
         """
         Inicializa el InnovationManager, comenzando con un contador de innovaciones y un contador de ID de genoma.
@@ -1048,7 +1788,7 @@ class InnovationManager:
         int o None: El número de innovación existente si la innovación está registrada, 
                     o None si la innovación no se ha registrado previamente.
         """
-        return self.innovations.get((innovation_type, gene_in_id, gene_out_id))
+        return self.innovations.get(self._innovation_key(innovation_type, gene_in_id, gene_out_id))
 
     def create_innovation(self, innovation_type: str, gene_in_id: int, gene_out_id: int, innovation_number: int = None) -> int:
         """
@@ -1068,9 +1808,31 @@ class InnovationManager:
         if innovation_number is None:
             innovation_number = self.next_innovation_number
             self.next_innovation_number += 1
-        self.innovations[(innovation_type, gene_in_id, gene_out_id)] = innovation_number
+        self.innovations[self._innovation_key(innovation_type, gene_in_id, gene_out_id)] = innovation_number
         return innovation_number
 
+    def _innovation_key(self, innovation_type: str, gene_in_id: int, gene_out_id: int):
+        """
+        Devuelve la clave de una innovación en `innovations`: un entero empaquetado si el tipo es
+        conocido y los IDs caben en 24 bits, o la tupla (tipo, entrada, salida) en otro caso.
+        Un entero y una tupla nunca son iguales, así que ambos tipos de clave conviven sin colisiones.
+        """
+        type_code = self._INNOVATION_TYPE_CODES.get(innovation_type)
+        if gene_out_id is None:
+            gene_out_id = self._NO_ID
+        if (type_code is not None and isinstance(gene_in_id, int) and isinstance(gene_out_id, int)
+                and 0 <= gene_in_id < self._NO_ID and 0 <= gene_out_id <= self._NO_ID):
+            return (type_code << (2 * self._ID_BITS)) | (gene_in_id << self._ID_BITS) | gene_out_id
+        return (innovation_type, gene_in_id, None if gene_out_id == self._NO_ID else gene_out_id)
+
+    def __setstate__(self, state):
+        """Convierte las claves en tupla de gestores serializados antes de empaquetarlas."""
+        self.__dict__.update(state)
+        self.innovations = {
+            (self._innovation_key(*key) if isinstance(key, tuple) else key): innovation_number
+            for key, innovation_number in self.innovations.items()
+        }
+
     def next_genome_id(self) -> int:
         """
         Devuelve el número de id disponible
@@ -1097,7 +1859,7 @@ class Species:
     ----------
     representative_genome (FeedforwardGenome): El genoma representativo de la especie
     members (List): Lista de los miembros de la especie
-    adjusted_fitnesses (dict): Diccionario que por cada genoma, almacena su fitness ajustado. 
+    adjusted_fitnesses (dict): Diccionario que por cada genome_id, almacena el fitness ajustado del genoma. 
     best_fitness (float): Almacena el fitness del mejor genoma
     last_improved (int): Generación en la que mejoró el fitness por última vez
     historical_best_fitness (float): Almacena el mejor fitness que se haya registrado para la especie
@@ -1135,7 +1897,7 @@ class Species:
         """
         self.representative_genome = representative_genome
         self.members = [representative_genome]  # Inicialmente, solo el representante es miembro
-        self.adjusted_fitnesses = {}  # Almacena el fitness ajustado de cada miembro
+        self.adjusted_fitnesses = {}  # Almacena el fitness ajustado de cada miembro, por genome_id
         self.best_fitness = representative_genome.fitness if hasattr(representative_genome, 'fitness') else -float('inf')
         self.last_improved = 0  # Generación en la que mejoró el fitness por última vez
         self.historical_best_fitness = self.best_fitness
@@ -1171,10 +1933,11 @@ class Species:
         bool
             True si el genoma es compatible, False de lo contrario.
         """
-        distance = self.calculate_compatibility_distance(genome)
+        distance = self.calculate_compatibility_distance(genome, compatibility_threshold=compatibility_threshold)
         return distance <= compatibility_threshold
 
-    def calculate_compatibility_distance(self, genome: 'FeedforwardGenome', c1: float = 1.0, c2: float = 1.0, c3: float = 1.0) -> float:
+    def calculate_compatibility_distance(self, genome: 'FeedforwardGenome', c1: float = 1.0, c2: float = 1.0, c3: float = 1.0,
+                                         compatibility_threshold: Optional[float] = None) -> float:
         """
         Calcula la distancia de compatibilidad entre un genoma y el representativo.
 
@@ -1195,78 +1958,83 @@ class Species:
             Coeficiente para el término de genes disjuntos. Por defecto es 1.0.
         c3 : float, opcional
             Coeficiente para el término de diferencia de peso. Por defecto es 1.0.
+        compatibility_threshold : float, opcional
+            Si se indica y la distancia supera con seguridad este umbral, se devuelve
+            infinito sin recorrer las innovaciones. Por defecto es None.
 
         Returns
         -------
         float
             La distancia de compatibilidad.
         """
-        excess = 0
-        disjoint = 0
-        weight_diff = 0
-        matching = 0
-
-        # Obtener los genes y conexiones de ambos genomas
         genes1 = self.representative_genome.genes
         genes2 = genome.genes
         connections1 = self.representative_genome.connections
         connections2 = genome.connections
+        N = max(len(genes1), len(genes2), len(connections1), len(connections2))
+        if N == 0:
+            N = 1  # Para evitar la división por cero
 
-        # Obtener los números de innovación de los genes
-        innovation_numbers1_genes = {gene[2] for gene in genes1.values() if len(gene) > 2 and gene[2] is not None}
-        innovation_numbers2_genes = {gene[2] for gene in genes2.values() if len(gene) > 2 and gene[2] is not None}
+        # Números de innovación ordenados y sin repetir: varios genes o conexiones pueden compartir
+        # innovación, y de cada innovación de conexión solo cuenta la primera conexión
+        innovation_numbers1_genes = self.representative_genome._node_arrays()['unique_innovations']
+        innovation_numbers2_genes = genome._node_arrays()['unique_innovations']
+        arrays1 = self.representative_genome._connection_arrays()
+        arrays2 = genome._connection_arrays()
+        innovation_numbers1_connections = arrays1['innovations'][arrays1['first']]
+        innovation_numbers2_connections = arrays2['innovations'][arrays2['first']]
+
+        if compatibility_threshold is not None:
+            # Cada innovación de diferencia en número es al menos un gen de exceso o disjunto
+            size_lower_bound = min(c1, c2) * (abs(len(innovation_numbers1_genes) - len(innovation_numbers2_genes))
+                                              + abs(len(innovation_numbers1_connections) - len(innovation_numbers2_connections))) / N
+            if size_lower_bound > compatibility_threshold:
+                return float('inf')
+
+        excess = 0
+        disjoint = 0
 
         # Calcular exceso y disjoint para genes
-        max_innovation1_genes = max(innovation_numbers1_genes) if innovation_numbers1_genes else 0
-        max_innovation2_genes = max(innovation_numbers2_genes) if innovation_numbers2_genes else 0
-        max_innovation_genes = max(max_innovation1_genes, max_innovation2_genes)
+        gene_excess, gene_disjoint = self._excess_and_disjoint(innovation_numbers1_genes, innovation_numbers2_genes)
+        excess += gene_excess
+        disjoint += gene_disjoint
 
-        for innovation_number in range(1, max_innovation_genes + 1):
-            in1 = innovation_number in innovation_numbers1_genes
-            in2 = innovation_number in innovation_numbers2_genes
+        # Calcular exceso, disjoint y diferencia de peso para conexiones
+        conn_excess, conn_disjoint = self._excess_and_disjoint(innovation_numbers1_connections, innovation_numbers2_connections)
+        excess += conn_excess
+        disjoint += conn_disjoint
 
-            if in1 and in2:
-                continue
-            elif in1 or in2:
-                if innovation_number > min(max_innovation1_genes, max_innovation2_genes):
-                    excess += 1
-                else:
-                    disjoint += 1
+        _, matching1, matching2 = np.intersect1d(innovation_numbers1_connections, innovation_numbers2_connections,
+                                                 assume_unique=True, return_indices=True)
+        matching_connections = len(matching1)
+        weights1 = arrays1['weights'][arrays1['first'][matching1]]
+        weights2 = arrays2['weights'][arrays2['first'][matching2]]
+        total_weight_diff = float(np.abs(weights1 - weights2).sum())
 
-        # Calcular exceso, disjoint y diferencia de peso para conexiones
-        innovation_numbers1_connections = {conn[2] for conn in connections1}
-        innovation_numbers2_connections = {conn[2] for conn in connections2}
-
-        max_innovation1_conn = max(innovation_numbers1_connections) if innovation_numbers1_connections else 0
-        max_innovation2_conn = max(innovation_numbers2_connections) if innovation_numbers2_connections else 0
-        max_innovation_conn = max(max_innovation1_conn, max_innovation2_conn)
-
-        total_weight_diff = 0
-        matching_connections = 0
-
-        for innovation_number in range(1, max_innovation_conn + 1):
-            conn1_list = [conn for conn in connections1 if conn[2] == innovation_number]
-            conn2_list = [conn for conn in connections2 if conn[2] == innovation_number]
-
-            if conn1_list and conn2_list:
-                conn1_key = conn1_list[0]
-                conn2_key = conn2_list[0]
-                matching_connections += 1
-                total_weight_diff += abs(connections1[conn1_key] - connections2[conn2_key])
-            elif conn1_list or conn2_list:
-                if innovation_number > min(max_innovation1_conn, max_innovation2_conn):
-                    excess += 1
-                else:
-                    disjoint += 1
-
-        # Calcular distancia de compatibilidad
-        N = max(len(genes1), len(genes2), len(connections1), len(connections2))
-        if N == 0:
-            N = 1  # Para evitar la división por cero
-        distance = (c1 * excess / N) + (c2 * disjoint / N) + (c3 * weight_diff / N)
+        # Calcular distancia de compatibilidad: el término de peso es la diferencia media de las conexiones coincidentes
+        avg_weight_diff = (total_weight_diff / matching_connections) if matching_connections else 0.0
+        distance = (c1 * excess + c2 * disjoint) / N + c3 * avg_weight_diff
 
         return distance
 
+    @staticmethod
+    def _excess_and_disjoint(innovations1: np.ndarray, innovations2: np.ndarray) -> Tuple[int, int]:
+        """
+        Cuenta los genes no coincidentes entre dos arreglos ordenados de números de innovación
+        sin repetidos.
+
+        Los que superan el máximo del genoma con menor innovación son de exceso; el resto,
+        disjuntos. Basta una diferencia simétrica en lugar de recorrer todo el rango de innovaciones.
+
+        Returns
+        -------
+        Tuple[int, int]: (exceso, disjuntos)
+        """
+        min_max_innovation = min(innovations1[-1] if innovations1.size else 0, innovations2[-1] if innovations2.size else 0)
+        unmatched = np.setxor1d(innovations1, innovations2, assume_unique=True)
+        disjoint = int(np.count_nonzero(unmatched <= min_max_innovation))
+        return len(unmatched) - disjoint, disjoint
+
     def adjust_fitnesses(self):
         """
         Ajusta los fitness de los genomas dentro de la especie.
@@ -1279,7 +2047,7 @@ class Species:
         self.adjusted_fitnesses = {}  # Reinicia los fitness ajustados
         for genome in self.members:
             adjusted_fitness = genome.fitness / species_size  # Compartición de fitness
-            self.adjusted_fitnesses[genome] = adjusted_fitness
+            self.adjusted_fitnesses[genome.genome_id] = adjusted_fitness
 
     def get_adjusted_fitness(self, genome: 'FeedforwardGenome') -> float:
         """
@@ -1297,7 +2065,8 @@ class Species:
         float
             El fitness ajustado del genoma, o el fitness sin ajustar si el genoma no está en la especie.
         """
-        return self.adjusted_fitnesses.get(genome, genome.fitness)
+        return self.adjusted_fitnesses.get(genome.genome_id, genome.fitness)
+
 
     def clear(self):
         """
@@ -1326,39 +2095,43 @@ class StagnationManager:
         self.max_stagnation = max_stagnation
         self.elitism = elitism
         self.species_last_improved = {}
-        self.sorted_species = SortedList(key  = lambda spec: spec.best_fitness)
 
     def update(self, species_list: List['Species'], generation: int) -> Dict['Species', bool]:
         stagnation_status = {}
-        
-        for spec in species_list:
-            if spec in self.sorted_species:
-                self.sorted_species.remove(spec)
-                self.sorted_species.add(spec)
-            else:
-                self.sorted_species.add(spec)
 
+        # Las especies son pocas: ordenarlas en cada llamada es más barato que mantener un
+        # contenedor ordenado cuya clave (best_fitness) cambia entre generaciones
         results = []
-        for spec in self.sorted_species:
+        for spec in species_list:
+            last_improved = self.species_last_improved.get(spec)
+
             # Initialize last improved generation if the species is new
-            if spec not in self.species_last_improved:
-                self.species_last_improved[spec] = generation
+            if last_improved is None:
+                last_improved = generation
                 self.update_historical_best_fitness(spec, spec.best_fitness)
                 stagnation_status[spec] = False
             # Check for improvement
-            elif spec.best_fitness > self.get_historical_best_fitness(spec):
-                self.species_last_improved[spec] = generation
+            elif spec.best_fitness > spec.historical_best_fitness:
+                last_improved = generation
                 self.update_historical_best_fitness(spec, spec.best_fitness)
                 stagnation_status[spec] = False
             # Check for stagnation
-            elif (generation - self.species_last_improved[spec]) >= self.max_stagnation:
+            elif (generation - last_improved) >= self.max_stagnation:
                 stagnation_status[spec] = True
             else:
                 stagnation_status[spec] = False
+            self.species_last_improved[spec] = last_improved
             results.append((spec, stagnation_status[spec]))
 
+        # Una especie que falta en una llamada conserva su historial; solo se olvidan las
+        # extintas (sin miembros), para que ni ellas ni sus genomas sigan referenciados
+        for spec in [spec for spec in self.species_last_improved if not spec.members]:
+            del self.species_last_improved[spec]
+
+
         # Mark the top 'elitism' species as not stagnant
-        results.sort(key=lambda x: max(g.fitness for g in x[0].members) if x[0].members else -float('inf'), reverse=True)
+        member_best_fitness = {spec: max((g.fitness for g in spec.members), default=-float('inf')) for spec, _ in results}
+        results.sort(key=lambda x: member_best_fitness[x[0]], reverse=True)
         for i in range(min(self.elitism, len(results))):
             results[i] = (results[i][0], False)
             stagnation_status[results[i][0]] = False
@@ -1366,15 +2139,26 @@ class StagnationManager:
         return stagnation_status
 
     def get_historical_best_fitness(self, species: 'Species') -> float:
-        return getattr(species, 'historical_best_fitness', -float('inf'))
+        return species.historical_best_fitness  # Species.__init__ siempre lo inicializa
 
     def update_historical_best_fitness(self, species: 'Species', fitness: float):
-        setattr(species, 'historical_best_fitness', max(self.get_historical_best_fitness(species), fitness))
+        if fitness > species.historical_best_fitness:
+            species.historical_best_fitness = fitness
+
+_EVALUATE_GENOME_CACHE_SIZE = 1024
+_evaluate_genome_cache = OrderedDict()  # {structural_hash del genoma: fitness} en orden LRU, ver evaluate_genome
+_evaluate_genome_data = None  # (features, target, versiones) a los que corresponde la caché
+_evaluate_genome_lock = threading.Lock()
 
 def evaluate_genome(genome: FeedforwardGenome, graph_features: torch.Tensor, target_average_path: torch.Tensor) -> float:
     """
     Evaluates the fitness of a FeedforwardGenome.
 
+    The network of a genome only depends on its structure (see `FeedforwardGenome._network_seed`),
+    so results are memoized by `FeedforwardGenome.structural_hash` in an LRU cache of
+    `_EVALUATE_GENOME_CACHE_SIZE` genomes. The cache belongs to one pair of data tensors: it is
+    emptied when other tensors are passed or they are modified in place (their `_version` changes).
+
         Attributes
         ----------
         genome (FeedforwardGenome): The genome to evaluate.
@@ -1387,29 +2171,353 @@ def evaluate_genome(genome: FeedforwardGenome, graph_features: torch.Tensor, tar
         -------
         float: The fitness score of the genome. Higher is generally better.
     """
-    # 1. Create the PyTorch network from the genome
-    num_inputs = graph_features.shape[1]  # Assuming graph_features shape is (batch_size, num_features)
+    global _evaluate_genome_data
+    # Genomes seen before with the same data are not evaluated again; the data is compared by
+    # identity and version, without reading it
+    data = (graph_features, target_average_path, graph_features._version, target_average_path._version)
+    cache_key = genome.structural_hash()
+    with _evaluate_genome_lock:
+        cached_data = _evaluate_genome_data
+        if (cached_data is None or cached_data[0] is not graph_features or cached_data[1] is not target_average_path
+                or cached_data[2:] != data[2:]):
+            _evaluate_genome_cache.clear()
+            _evaluate_genome_data = data
+        elif cache_key in _evaluate_genome_cache:
+            _evaluate_genome_cache.move_to_end(cache_key)
+            return _evaluate_genome_cache[cache_key]
+
+    # 1. Ensure graph_features and target have a batch dimension (unsqueeze at dimension 0 if necessary)
+    if graph_features.dim() == 1:
+        graph_features = graph_features.unsqueeze(0)  # Now it's (1, num_features)
+    if target_average_path.dim() == 1:
+        target_average_path = target_average_path.unsqueeze(0)  # Ensure target also has batch dimension
+
+    # 2. Create the PyTorch network from the genome
+    num_inputs = graph_features.shape[1]  # graph_features shape is (batch_size, num_features)
     net = genome.create_pytorch_network(num_inputs=num_inputs)
     net.eval()  # Set the network to evaluation mode
 
-    # 2. Ensure graph_features has a batch dimension (unsqueeze at dimension 0 if necessary)
-    if len(graph_features.shape) == 1:
-        graph_features = graph_features.unsqueeze(0)  # Now it's (1, num_features)
-
-    # 3. Perform forward pass
-    with torch.no_grad():
+    # 3. Forward pass and fitness (negative loss: lower loss means better fitness) in a single inference block
+    with torch.inference_mode():
         output = net(graph_features)
+        loss = F.mse_loss(output, target_average_path)
+    fitness = -loss.item()
+
+    with _evaluate_genome_lock:
+        if _evaluate_genome_data is data:  # Skip if other data was passed in the meantime
+            _evaluate_genome_cache[cache_key] = fitness
+            if len(_evaluate_genome_cache) > _EVALUATE_GENOME_CACHE_SIZE:
+                _evaluate_genome_cache.popitem(last=False)
+    return fitness
 
-    # 4. Ensure target has the batch dimension
-    if len(target_average_path.shape) == 1:
-        target_average_path = target_average_path.unsqueeze(0)  # Ensure target also has batch dimension
-    
-    # 5. Calculate fitness based on the output and target
-    criterion = nn.MSELoss()
-    loss = criterion(output, target_average_path)
-    fitness = -loss.item()  # Negative loss as fitness (lower loss means better fitness)
+def _stack_graph_data(
+graph_data: List[tuple[torch.Tensor, torch.Tensor]]) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Apila los pares (features, target) en un tensor de características (N, num_inputs)
+    y un tensor de objetivos con un valor por muestra.
+    """
+    features = torch.stack([features for features, _ in graph_data])
+    targets = torch.stack([target for _, target in graph_data])
+    return features, targets
 
-    return fitness
+def _evaluate_one(genome: FeedforwardGenome, features: torch.Tensor, targets: torch.Tensor,
+                  low_precision: bool = False) -> float:
+    """
+    Evalúa un genoma y devuelve su fitness. Se define a nivel de módulo para poder
+    enviarse a los procesos de `Population.evaluate_fitness`.
+    """
+    return genome.evaluate_batch(features, targets, low_precision=low_precision)
+
+
+def _init_evaluation_worker():
+    """
+    Inicializa cada proceso de evaluación con un único hilo de PyTorch, para que los procesos
+    no compitan entre sí por los núcleos.
+    """
+    torch.set_num_threads(1)
+
+class _GenomeEvaluator:
+    """
+    Evaluador de genomas para el backend 'ray' de `Population.evaluate_fitness`; cada actor
+    de Ray es una instancia que evalúa con un único hilo de PyTorch y sin autograd.
+    """
+    def __init__(self):
+        _init_evaluation_worker()
+        torch.set_grad_enabled(False)
+
+    def evaluate(self, genomes: List[FeedforwardGenome], data: Tuple[torch.Tensor, torch.Tensor],
+                 low_precision: bool = False) -> List[float]:
+        features, targets = data
+        return [_evaluate_one(genome, features, targets, low_precision) for genome in genomes]
+
+def _batched_forward(x: torch.Tensor, w1: torch.Tensor, b1: torch.Tensor, w2: torch.Tensor, b2: torch.Tensor,
+                     w3: torch.Tensor, b3: torch.Tensor) -> torch.Tensor:
+    """
+    Forward de P redes ModifiableNet plegadas a la vez: x es (P, N, entradas) y cada capa
+    aporta sus pesos traspuestos (P, entrada, salida) y su bias (P, 1, salida).
+    """
+    x = torch.relu(torch.baddbmm(b1, x, w1))
+    x = torch.relu(torch.baddbmm(b2, x, w2))
+    return torch.baddbmm(b3, x, w3)
+
+_device_datasets = OrderedDict()  # Copias de los datos en cada dispositivo, ver _dataset_on_device
+
+def _dataset_on_device(features: torch.Tensor, targets: torch.Tensor, device: torch.device,
+                       dtype: torch.dtype) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Devuelve features (convertidas a dtype) y targets en device, copiándolos solo la primera vez.
+
+    Las copias se reutilizan mientras se pasen los mismos tensores sin modificar (misma identidad
+    y mismo `_version`), como hace `Population.evaluate_fitness` entre generaciones. Hacia una GPU
+    los datos se fijan en memoria (pinned) y se copian de forma asíncrona una sola vez. Se
+    conservan las copias de las últimas 8 combinaciones de datos, dispositivo y dtype.
+    """
+    key = (id(features), id(targets), device, dtype)
+    versions = (features._version, targets._version)
+    cached = _device_datasets.get(key)
+    # La entrada guarda referencias a los tensores originales, así que su id no se reutiliza mientras exista
+    if cached is not None and cached[0] is features and cached[1] is targets and cached[2] == versions:
+        _device_datasets.move_to_end(key)
+        return cached[3], cached[4]
+    pin = device.type == 'cuda'
+    device_tensors = []
+    for tensor, tensor_dtype in ((features, dtype), (targets, targets.dtype)):
+        if pin and tensor.device.type == 'cpu':
+            tensor = tensor.pin_memory()
+        device_tensors.append(tensor.to(device, dtype=tensor_dtype, non_blocking=pin))
+    _device_datasets[key] = (features, targets, versions, *device_tensors)
+    while len(_device_datasets) > 8:
+        _device_datasets.popitem(last=False)
+    return device_tensors[0], device_tensors[1]
+
+@lru_cache(maxsize=1)
+def _compiled_batched_forward() -> Callable:
+    """Versión compilada de `_batched_forward`, creada una sola vez (sin compilar si falla la compilación)."""
+    return _CompiledFallback(_batched_forward, dynamic=True)
+
+def evaluate_population(genomes: List[FeedforwardGenome], features: torch.Tensor, targets: torch.Tensor,
+                        device=None, low_precision: bool = False) -> List[float]:
+    """
+    Evalúa el fitness de todos los genomas en un único forward vectorizado.
+
+    Todos los genomas usan la misma arquitectura (ModifiableNet) y solo difieren en sus
+    pesos, así que cada genoma escribe los pesos de cada capa directamente en un tensor
+    apilado (P, salida, entrada), sin construir ninguna red, y la población entera se evalúa
+    con tres GEMM por lotes (`_batched_forward`). Con varios
+    dispositivos la población se reparte en bloques consecutivos, uno por dispositivo, que
+    se lanzan todos antes de recoger ningún resultado para que trabajen a la vez.
+
+    Attributes
+    ----------
+    genomes (List[FeedforwardGenome]): Genomas a evaluar; se actualiza su atributo fitness.
+    features (torch.Tensor): Características apiladas, de forma (N, num_inputs).
+    targets (torch.Tensor): Valores objetivo apilados, uno por muestra.
+    device (torch.device o List[torch.device], opcional): Dispositivo o dispositivos de cálculo.
+        Por defecto todas las GPU disponibles, o la CPU si no hay ninguna.
+    low_precision (bool, opcional): Ejecuta el forward en bfloat16. Por defecto es False.
+
+    Returns
+    -------
+    List[float]: El fitness de cada genoma, en el mismo orden.
+    """
+    if device is None:
+        devices = [torch.device('cuda', index) for index in range(torch.cuda.device_count())] or [torch.device('cpu')]
+    elif isinstance(device, (list, tuple)):
+        devices = [torch.device(shard_device) for shard_device in device]
+    else:
+        devices = [torch.device(device)]
+    if not genomes:
+        return []
+    num_inputs = features.shape[1]
+    # Con low_precision los pesos se guardan directamente en bfloat16: la mitad de memoria
+    # para los parámetros apilados de toda la población
+    dtype = torch.bfloat16 if low_precision else torch.float32
+    # Pesos de fc1, fc2 y fc3 de cada genoma con la BatchNorm ya integrada: la red vectorizada
+    # solo hace Linear -> ReLU
+    weights = [torch.empty(len(genomes), 64, num_inputs), torch.empty(len(genomes), 32, 64), torch.empty(len(genomes), 1, 32)]
+    for genome, fc1, fc2, fc3 in zip(genomes, *weights):
+        genome._fill_network_weights(fc1, fc2, fc3, scale=_FRESH_BATCHNORM_SCALE)
+    layers = []
+    for weight in weights:
+        # Pesos traspuestos (P, entrada, salida) y bias (P, 1, salida), que en ModifiableNet son cero, para baddbmm
+        layers.append(weight.transpose(1, 2).to(dtype))
+        layers.append(torch.zeros(len(genomes), 1, weight.shape[1], dtype=dtype))
+
+
+    # Copias de los pesos al dispositivo asíncronas: desde memoria fijada (pinned) no bloquean al host
+    def to_device(tensor, target_device):
+        pin = target_device.type == 'cuda'
+        if pin and tensor.device.type == 'cpu':
+            tensor = tensor.pin_memory()
+        return tensor.to(target_device, non_blocking=pin)
+
+    shard_size = -(-len(genomes) // len(devices))
+    fitness_shards = []
+    with torch.inference_mode():
+        for shard_device, start in zip(devices, range(0, len(genomes), shard_size)):
+            stop = min(start + shard_size, len(genomes))
+            shard_layers = [to_device(tensor[start:stop], shard_device) for tensor in layers]
+            # Los datos solo se copian a cada dispositivo la primera vez (ver _dataset_on_device)
+            shard_features, shard_targets = _dataset_on_device(features, targets, shard_device, dtype)
+
+            predictions = _compiled_batched_forward()(shard_features.expand(stop - start, *shard_features.shape), *shard_layers)  # (P, N, 1)
+            # log_mse_loss por genoma: la media se toma sobre las muestras de cada uno
+            predictions = predictions.float().reshape(stop - start, -1)
+            squared_errors = log_mse_loss(predictions, shard_targets.reshape(1, -1).expand_as(predictions), reduction='none')
+            fitness_shards.append(squared_errors.mean(dim=1).neg())
+    # Una sola sincronización con cada dispositivo, después de lanzar todos los bloques
+    fitnesses = [fitness for fitness_shard in fitness_shards for fitness in fitness_shard.tolist()]
+    for genome, fitness in zip(genomes, fitnesses):
+        genome.fitness = fitness
+    return fitnesses
+
+def _unmatched_counts(candidate: np.ndarray, representatives: List[np.ndarray]):
+    """
+    Compara un arreglo ordenado de innovaciones sin repetidos con los de varios representantes a la vez.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        Por representante: (exceso, disjuntos, coincidencias), y para el arreglo concatenado de
+        los representantes, la máscara de coincidencias y la posición de cada una en `candidate`.
+    """
+    lengths = np.array([len(innovations) for innovations in representatives], dtype=np.int64)
+    segments = np.repeat(np.arange(len(representatives)), lengths)
+    concatenated = np.concatenate(representatives) if representatives else np.zeros(0, dtype=np.int64)
+    positions = np.searchsorted(candidate, concatenated)
+    matched = np.zeros(len(concatenated), dtype=bool)
+    if candidate.size:
+        matched = candidate[np.minimum(positions, candidate.size - 1)] == concatenated
+    matching = np.bincount(segments, weights=matched, minlength=len(representatives)).astype(np.int64)
+
+    # Mismo criterio que Species._excess_and_disjoint: hasta el menor de los dos máximos es disjunto
+    representative_max = np.array([innovations[-1] if innovations.size else 0 for innovations in representatives], dtype=np.int64)
+    min_max = np.minimum(representative_max, candidate[-1] if candidate.size else 0)
+    disjoint = np.bincount(segments, weights=~matched & (concatenated <= min_max[segments]), minlength=len(representatives)).astype(np.int64)
+    # Las coincidencias nunca superan min_max, así que se descuentan directamente
+    disjoint += np.searchsorted(candidate, min_max, side='right') - matching
+    unmatched = lengths + candidate.size - 2 * matching
+    return unmatched - disjoint, disjoint, matching, matched, positions
+
+def compatibility_distances(genome: FeedforwardGenome, species_list: List['Species'],
+                            c1: float = 1.0, c2: float = 1.0, c3: float = 1.0) -> np.ndarray:
+    """
+    Calcula la distancia de compatibilidad entre un genoma y el representante de cada especie
+    en un único paso vectorizado, con el mismo resultado que llamar a
+    `Species.calculate_compatibility_distance` especie por especie.
+
+    Attributes
+    ----------
+    genome (FeedforwardGenome): Genoma a clasificar.
+    species_list (List[Species]): Especies contra cuyos representantes se compara.
+    c1, c2, c3 (float, opcional): Coeficientes de exceso, disjuntos y diferencia de peso.
+
+    Returns
+    -------
+    np.ndarray: Distancia a cada especie, en el mismo orden que species_list.
+    """
+    representatives = [spec.representative_genome for spec in species_list]
+
+    gene_excess, gene_disjoint, _, _, _ = _unmatched_counts(
+        genome._node_arrays()['unique_innovations'], [rep._node_arrays()['unique_innovations'] for rep in representatives])
+
+    # Como en Species.calculate_compatibility_distance, solo cuenta la primera conexión de cada innovación
+    def first_connections(arrays):
+        return arrays['innovations'][arrays['first']], arrays['weights'][arrays['first']]
+
+    innovations, weights = first_connections(genome._connection_arrays())
+    representative_connections = [first_connections(rep._connection_arrays()) for rep in representatives]
+    conn_excess, conn_disjoint, matching_connections, matched, positions = _unmatched_counts(
+        innovations, [rep_innovations for rep_innovations, _ in representative_connections])
+    representative_weights = np.concatenate([rep_weights for _, rep_weights in representative_connections]) if representatives else np.zeros(0)
+    segments = np.repeat(np.arange(len(representatives)), [len(rep_weights) for _, rep_weights in representative_connections])
+    weight_gaps = np.abs(representative_weights[matched] - weights[positions[matched]])
+
+    total_weight_diff = np.bincount(segments[matched], weights=weight_gaps, minlength=len(representatives))
+
+    excess = gene_excess + conn_excess
+    disjoint = gene_disjoint + conn_disjoint
+    N = np.array([max(len(rep.genes), len(genome.genes), len(rep.connections), len(genome.connections), 1)
+                  for rep in representatives], dtype=np.float64)
+    avg_weight_diff = np.divide(total_weight_diff, matching_connections,
+                                out=np.zeros(len(representatives)), where=matching_connections > 0)
+    return (c1 * excess + c2 * disjoint) / N + c3 * avg_weight_diff
+
+def find_compatible_species(genome: FeedforwardGenome, species_list: List['Species'],
+                            compatibility_threshold: float) -> Optional['Species']:
+    """
+    Devuelve la primera especie de species_list compatible con el genoma (distancia menor o igual
+    al umbral), o None si no hay ninguna. Equivale a recorrer las especies con `Species.is_compatible`.
+    """
+    if not species_list:
+        return None
+    compatible = np.flatnonzero(compatibility_distances(genome, species_list) <= compatibility_threshold)
+    return species_list[compatible[0]] if compatible.size else None
+
+def _crossover_kernel(innovations1, innovations2, draws, take_unmatched1, take_unmatched2):
+    """
+    Recorre a la vez (dos punteros) las innovaciones ordenadas de dos padres y decide de cuál
+    se hereda cada una: las coincidentes de uno u otro según draws (un valor en [0, 1) por
+    coincidencia, en orden), las no coincidentes solo del padre indicado por take_unmatched1/2.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]: Para cada elemento heredado, el padre de origen (1 o 2, o
+    -1 y -2 si era coincidente) y su posición en el arreglo de ese padre.
+    """
+    n1 = innovations1.shape[0]
+    n2 = innovations2.shape[0]
+    parents = np.empty(n1 + n2, dtype=np.int64)
+    indices = np.empty(n1 + n2, dtype=np.int64)
+    i = 0
+    j = 0
+    matched = 0
+    count = 0
+    while i < n1 or j < n2:
+        if i < n1 and j < n2 and innovations1[i] == innovations2[j]:
+            if draws[matched] < 0.5:
+                parents[count] = -1
+                indices[count] = i
+            else:
+                parents[count] = -2
+                indices[count] = j
+            matched += 1
+            count += 1
+            i += 1
+            j += 1
+        elif j >= n2 or (i < n1 and innovations1[i] < innovations2[j]):
+            if take_unmatched1:
+                parents[count] = 1
+                indices[count] = i
+                count += 1
+            i += 1
+        else:
+            if take_unmatched2:
+                parents[count] = 2
+                indices[count] = j
+                count += 1
+            j += 1
+    return parents[:count], indices[:count]
+
+if _NUMBA_AVAILABLE:
+    _crossover_kernel = njit(cache=True)(_crossover_kernel)
+
+def _crossover_select(innovations1: np.ndarray, innovations2: np.ndarray, take_unmatched1: bool, take_unmatched2: bool,
+                      rng: np.random.Generator):
+    """
+    Decide, a partir de las innovaciones ordenadas y sin repetidos de cada padre, qué elementos
+    hereda el hijo (ver `_crossover_kernel`), sorteando un número aleatorio por coincidencia.
+
+    Returns
+    -------
+    Tuple[List[int], List[int]]: Padre de origen (1 o 2, negativo si la innovación está en ambos)
+    y posición en el arreglo de ese padre de cada elemento heredado, en orden de innovación.
+    """
+    num_matching = np.count_nonzero(np.isin(innovations1, innovations2, assume_unique=True))
+    # Todos los sorteos de las coincidencias en una sola extracción
+    draws = rng.random(num_matching)
+    parents, indices = _crossover_kernel(innovations1, innovations2, draws, take_unmatched1, take_unmatched2)
+    return parents.tolist(), indices.tolist()
 
 def crossover(parent1: FeedforwardGenome, parent2: FeedforwardGenome, innovation_manager: InnovationManager) -> FeedforwardGenome:
     """
@@ -1427,58 +2535,70 @@ def crossover(parent1: FeedforwardGenome, parent2: FeedforwardGenome, innovation
     """
 
     fittest_parent = parent1 if parent1.fitness > parent2.fitness else parent2
-    child = FeedforwardGenome(genome_id=innovation_manager.next_genome_id(),
-                                num_inputs=sum(1 for gene_info in parent1.genes.values() if gene_info[0] == 'input'),
-                                num_outputs=sum(1 for gene_info in parent1.genes.values() if gene_info[0] == 'output'),
-                                innovation_manager = innovation_manager)
+    # Partición por tipo de nodo cacheada en el genoma: sin recorrer todos los genes en cada cruce
+    parent1_nodes_by_type = parent1._get_nodes_by_type()
+    num_inputs = len(parent1_nodes_by_type['input'])
+    num_outputs = len(parent1_nodes_by_type['output'])
+    # Como en FeedforwardGenome.copy, no se pasa por el constructor: crearía (gastando números
+    # aleatorios y registrando innovaciones) una red que se reemplaza entera
+    child = FeedforwardGenome.__new__(FeedforwardGenome)
+    child.genome_id = innovation_manager.next_genome_id()
     innovation_manager.increment_genome_id()
+    child.fitness = None
+    child.innovation_manager = innovation_manager
+    # Los mismos IDs de salida que asignaba el constructor, tras sus 8 nodos ocultos por defecto
+    child.output_nodes = list(range(num_inputs + 8, num_inputs + 8 + num_outputs))
+    child._rng = np.random.default_rng(random.getrandbits(64))
+
 
     genes1 = parent1.genes
     genes2 = parent2.genes
     connections1 = parent1.connections
     connections2 = parent2.connections
 
+    take_unmatched1 = fittest_parent == parent1
+    take_unmatched2 = fittest_parent == parent2
+
+    # Innovaciones ordenadas de cada padre a partir de sus arreglos cacheados; np.unique devuelve además
+    # la primera aparición de cada una, que es la que se hereda ante innovaciones repetidas
+    nodes1 = parent1._node_arrays()
+    nodes2 = parent2._node_arrays()
+    gene_innovations1, first1 = np.unique(nodes1['innovations'], return_index=True)
+    gene_innovations2, first2 = np.unique(nodes2['innovations'], return_index=True)
+    gene_ids1 = nodes1['ids'][first1].tolist()
+    gene_ids2 = nodes2['ids'][first2].tolist()
+
     child.genes = {}
+    max_node_id = -1  # Para next_node_id, sin recorrer de nuevo los genes del hijo
     # Crossover genes based on innovation number
-    all_gene_innovations = set(gene_info[2] for gene_info in genes1.values()) | set(gene_info[2] for gene_info in genes2.values())
-    for innovation in sorted(list(all_gene_innovations)):
-        gene1_item = next(((node_id, gene_info) for node_id, gene_info in genes1.items() if gene_info[2] == innovation), None)
-        gene2_item = next(((node_id, gene_info) for node_id, gene_info in genes2.items() if gene_info[2] == innovation), None)
-
-        if gene1_item and gene2_item:
-            node_id1, gene1 = gene1_item
-            node_id2, gene2 = gene2_item
-            if random.random() < 0.5:
-                child.genes[node_id1] = (gene1[0], gene1[1], gene1[2], gene1[3] if len(gene1) > 3 else 0)
-            else:
-                child.genes[node_id2] = (gene2[0], gene2[1], gene2[2], gene2[3] if len(gene2) > 3 else 0)
-        elif gene1_item and fittest_parent == parent1:
-            node_id, gene1 = gene1_item
-            child.genes[node_id] = gene1
-        elif gene2_item and fittest_parent == parent2:
-            node_id, gene2 = gene2_item
-            child.genes[node_id] = gene2
+    for parent, index in zip(*_crossover_select(gene_innovations1, gene_innovations2, take_unmatched1, take_unmatched2, child._rng)):
+        node_id, gene = (gene_ids1[index], genes1[gene_ids1[index]]) if parent in (1, -1) else (gene_ids2[index], genes2[gene_ids2[index]])
+        if node_id > max_node_id:
+            max_node_id = node_id
+        if parent < 0:
+            child.genes[node_id] = (gene[0], gene[1], gene[2], gene[3] if len(gene) > 3 else 0)
+        else:
+            child.genes[node_id] = gene
+
+    arrays1 = parent1._connection_arrays()
+    arrays2 = parent2._connection_arrays()
+    connection_innovations1, first1 = np.unique(arrays1['innovations'], return_index=True)
+    connection_innovations2, first2 = np.unique(arrays2['innovations'], return_index=True)
+    keys1 = list(zip(arrays1['sources'][first1].tolist(), arrays1['targets'][first1].tolist(), connection_innovations1.tolist()))
+    keys2 = list(zip(arrays2['sources'][first2].tolist(), arrays2['targets'][first2].tolist(), connection_innovations2.tolist()))
 
     child.connections = {}
     # Crossover connections based on innovation number
-    all_connection_innovations = set(innov for _, _, innov in connections1.keys()) | set(innov for _, _, innov in connections2.keys())
-    for innovation in sorted(list(all_connection_innovations)):
-        conn1 = next((((in_node, out_node, innov), weight) for (in_node, out_node, innov), weight in connections1.items() if innov == innovation), None)
-        conn2 = next((((in_node, out_node, innov), weight) for (in_node, out_node, innov), weight in connections2.items() if innov == innovation), None)
-
-        if conn1 and conn2:
-            chosen_conn, weight = conn1 if random.random() < 0.5 else conn2
-            child.connections[(chosen_conn[0], chosen_conn[1], innovation)] = weight
-        elif conn1 and fittest_parent == parent1:
-            child.connections[conn1[0]] = conn1[1]
-        elif conn2 and fittest_parent == parent2:
-            child.connections[conn2[0]] = conn2[1]
-
-    # Ensure child's next_node_id is consistent
-    if child.genes:
-        child.next_node_id = max(child.genes.keys()) + 1
-    else:
-        child.next_node_id = 0
+    for parent, index in zip(*_crossover_select(connection_innovations1, connection_innovations2, take_unmatched1, take_unmatched2, child._rng)):
+        if parent in (1, -1):
+            child.connections[keys1[index]] = connections1[keys1[index]]
+        else:
+            child.connections[keys2[index]] = connections2[keys2[index]]
+
+    child._invalidate_caches()
+
+    # Ensure child's next_node_id is consistent (0 for a child without genes)
+    child.next_node_id = max_node_id + 1
 
     return child
     
@@ -1509,54 +2629,60 @@ def mutate(genome: FeedforwardGenome, innovation_manager: InnovationManager,
     eliminate_connection_rate (float): valor con el cual se controla con qué frecuencia se elimina una conexión   
     """
 
+    # Los seis sorteos de la mutación en una sola extracción del generador del genoma
+    draws = genome._rng.random(6).tolist()
+
     # Mutate weights
-    if random.random() < weight_mutation_rate and genome.connections:
+    if draws[0] < weight_mutation_rate and genome.connections:
         genome.mutate_weights(mutation_rate=0.5, weight_mutation_power=0.2)
 
     # Mutate biases
-    if random.random() < mutation_rate: # Using general mutation rate for bias
+    if draws[1] < mutation_rate: # Using general mutation rate for bias
         genome.mutate_biases(mutation_rate=0.5, bias_mutation_power=0.2)
 
     # Add new node
-    if random.random() < add_node_rate and genome.connections:
-        possible_in_nodes = [node_id for node_id in genome.genes if genome.genes[node_id][0] != 'output']
-        possible_out_nodes = [node_id for node_id in genome.genes if genome.genes[node_id][0] != 'input']
+    if draws[2] < add_node_rate and genome.connections:
+        possible_in_nodes, possible_out_nodes = genome._get_connection_candidates()
         genome.mutate_add_node(possible_in_nodes, possible_out_nodes, innovation_manager)
 
     # Add new connection
-    if random.random() < add_connection_rate and len(genome.genes) >= 2:
-        possible_in_nodes = [node_id for node_id in genome.genes if genome.genes[node_id][0] != 'output']
-        possible_out_nodes = [node_id for node_id in genome.genes if genome.genes[node_id][0] != 'input']
+    if draws[3] < add_connection_rate and len(genome.genes) >= 2:
+        # Solo se recalculan si la rama anterior añadió un nodo
+        possible_in_nodes, possible_out_nodes = genome._get_connection_candidates()
         genome.mutate_add_connection(possible_in_nodes, possible_out_nodes, innovation_manager)
 
     # Eliminate node
-    if random.random() < eliminate_node_rate and genome.get_num_hidden_nodes() > 0: # Need to add this method to Genome
+    if draws[4] < eliminate_node_rate and genome.get_num_hidden_nodes() > 0: # Need to add this method to Genome
         genome.mutate_eliminate_node()
 
     # Eliminate connection
-    if random.random() < eliminate_connection_rate and genome.connections:
+    if draws[5] < eliminate_connection_rate and genome.connections:
         genome.mutate_eliminate_connection()
 
     return genome
 
-def log_mse_loss(predictions, targets):
-    """Calculates MSE on the log-transformed values."""
+def log_mse_loss(predictions, targets, reduction: str = 'mean'):
+    """Calculates MSE on the log-transformed values (reduction as in F.mse_loss)."""
     log_predictions = torch.log(torch.abs(predictions) + 1e-6) # Add epsilon to avoid log(0)
     log_targets = torch.log(torch.abs(targets) + 1e-6)
-    criterion = nn.MSELoss()
-    return criterion(log_predictions, log_targets)
+    return F.mse_loss(log_predictions, log_targets, reduction=reduction)
 
 def percentage_mse_loss(predictions, targets):
     """Calculates the Mean Squared Percentage Error (MSPE)."""
     epsilon = 1e-6
-    percentage_errors = ((predictions - targets) / (targets + epsilon)) * 100
-    return torch.mean(percentage_errors**2)
+    # El factor 100 se aplica al cuadrado sobre la media (1e4): una operación menos por elemento
+    return torch.square((predictions - targets) / (targets + epsilon)).mean() * 1e4
 
 def percentage_mae_loss(predictions, targets):
     """Calculates the Mean Absolute Percentage Error (MAPE)."""
     epsilon = 1e-6
-    absolute_percentage_errors = torch.abs((predictions - targets) / (targets + epsilon)) * 100
-    return torch.mean(absolute_percentage_errors)
+    return ((predictions - targets) / (targets + epsilon)).abs().mean() * 100
+
+# TorchInductor fusiona cada cadena de operaciones elemento a elemento en un único kernel; la
+# compilación se hace en la primera llamada de cada función y, si falla, se usa la versión sin compilar
+log_mse_loss = _CompiledFallback(log_mse_loss, dynamic=True)
+percentage_mse_loss = _CompiledFallback(percentage_mse_loss, dynamic=True)
+percentage_mae_loss = _CompiledFallback(percentage_mae_loss, dynamic=True)
 
 
 #************************************** Definición de funciones para GNN *******************************************#
@@ -0,0 +1,353 @@
+"""
+Pruebas de regresión de NEATNNG. Se ejecutan desde la raíz del repositorio con:
+
+    python -m unittest discover -s tests
+"""
+import math
+import os
+import pickle
+import random
+import subprocess
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+import torch
+
+import NEATNNG as N
+
+
+def manual_genome(genes, connections, output_nodes, innovation_manager=None):
+    """Construye un genoma con genes y conexiones dados, sin nodos ni conexiones aleatorias."""
+    genome = N.FeedforwardGenome(0, 0, 0, innovation_manager or N.InnovationManager(), initial_hidden_nodes=0, seed=0)
+    genome.genes = dict(genes)
+    genome.connections = dict(connections)
+    genome.output_nodes = list(output_nodes)
+    genome.next_node_id = max(genome.genes) + 1 if genome.genes else 0
+    genome._invalidate_caches()
+    return genome
+
+
+def random_genomes(count, seed, num_inputs=4, num_outputs=2, mutations=6):
+    """Genomas aleatorios con estructura variada (nodos y conexiones añadidos y eliminados)."""
+    random.seed(seed)
+    innovation_manager = N.InnovationManager()
+    genomes = []
+    for genome_id in range(count):
+        genome = N.FeedforwardGenome(genome_id, num_inputs, num_outputs, innovation_manager,
+                                     initial_hidden_nodes=random.randint(0, 6))
+        for _ in range(random.randint(0, mutations)):
+            N.mutate(genome, innovation_manager, 0.5, 0.5, 0.5, 0.5, 0.2, 0.2)
+        genome.fitness = random.random()
+        genomes.append(genome)
+    return genomes, innovation_manager
+
+
+class TestConnectionMatrix(unittest.TestCase):
+    def setUp(self):
+        self.matrix = N.ConnectionMatrix()
+        for node in [5, 1, 9, 3]:
+            self.matrix.agregar_nodo(node)
+        self.matrix.agregar_conexion(1, 9)
+        self.matrix.agregar_conexion(5, 9)
+        self.matrix.agregar_conexion(9, 3)
+
+    def test_connections(self):
+        self.assertTrue(self.matrix.existe_conexion(1, 9))
+        self.assertFalse(self.matrix.existe_conexion(9, 1))
+        self.assertEqual(sorted(self.matrix.conexiones_entrantes(9)), [1, 5])
+        self.assertEqual(self.matrix.conexiones_salientes(9), [3])
+
+    def test_matrix_follows_node_order(self):
+        expected = np.zeros((4, 4))
+        expected[0, 3] = expected[2, 3] = expected[3, 1] = 1  # Filas y columnas en el orden 1, 3, 5, 9
+        np.testing.assert_array_equal(self.matrix.obtener_matriz(), expected)
+
+    def test_cached_matrix_is_read_only(self):
+        matrix = self.matrix.obtener_matriz()
+        self.assertIs(self.matrix.obtener_matriz(), matrix)
+        with self.assertRaises(ValueError):
+            matrix[0, 0] = True
+        self.matrix.agregar_conexion(3, 1)
+        self.assertTrue(self.matrix.obtener_matriz()[1, 0])
+
+    def test_modify_and_remove(self):
+        self.matrix.modificar_conexiones_nodo(3, {1: True, 9: False}, {5: True})
+        self.assertEqual(sorted(self.matrix.conexiones_entrantes(3)), [1])
+        self.assertEqual(self.matrix.conexiones_salientes(3), [5])
+        self.matrix.eliminar_nodo(9)
+        self.assertNotIn(9, self.matrix.nodos)
+        self.assertEqual(self.matrix.conexiones_salientes(1), [3])
+        self.matrix.eliminar_conexiones_nodo(3)
+        self.assertEqual(self.matrix.obtener_matriz().sum(), 0)
+        for node in list(self.matrix.nodos):
+            self.matrix.eliminar_nodo(node)
+        self.assertEqual(self.matrix.obtener_matriz().shape, (0, 0))
+
+
+class TestActivate(unittest.TestCase):
+    def setUp(self):
+        self.genome = manual_genome(
+            genes={0: ('input', 'identity', 1), 1: ('input', 'identity', 2),
+                   2: ('hidden', 'relu', 3, 0.5), 3: ('output', 'sigmoid', 4, -0.2)},
+            connections={(0, 2, 10): 1.5, (1, 2, 11): -2.0, (2, 3, 12): 0.8, (1, 3, 13): 0.3},
+            output_nodes=[3])
+
+    def expected(self, x0, x1):
+        hidden = max(0.0, 1.5 * x0 - 2.0 * x1 + 0.5)
+        return 1.0 / (1.0 + math.exp(-(0.8 * hidden + 0.3 * x1 - 0.2)))
+
+    def test_matches_hand_computed_network(self):
+        for inputs in ([0.0, 0.0], [1.0, 0.2], [-0.5, 0.7], [3.0, -1.0]):
+            self.assertAlmostEqual(self.genome.activate(inputs)[0], self.expected(*inputs), places=12)
+
+    def test_numba_and_numpy_paths_agree(self):
+        genomes, _ = random_genomes(25, seed=1)
+        rng = np.random.default_rng(0)
+        for genome in genomes:
+            inputs = rng.normal(size=genome.get_num_inputs()).tolist()
+            with mock.patch.object(N, '_NUMBA_AVAILABLE', True):
+                kernel_outputs = genome.activate(inputs)
+            with mock.patch.object(N, '_NUMBA_AVAILABLE', False):
+                numpy_outputs = genome.activate(inputs)
+            np.testing.assert_allclose(kernel_outputs, numpy_outputs, rtol=1e-12, atol=1e-12)
+
+    def test_bias_mutation_updates_cached_plan(self):
+        self.genome.activate([1.0, 0.2])
+        self.genome.mutate_biases(mutation_rate=1.0, bias_mutation_power=0.5)
+        fresh = manual_genome(self.genome.genes, self.genome.connections, self.genome.output_nodes)
+        self.assertEqual(self.genome.activate([1.0, 0.2]), fresh.activate([1.0, 0.2]))
+
+
+class TestCompatibilityDistance(unittest.TestCase):
+    def setUp(self):
+        self.genome1 = manual_genome(
+            genes={0: ('input', 'identity', 1), 1: ('hidden', 'relu', 2, 0.0), 2: ('output', 'identity', 3, 0.0)},
+            connections={(0, 1, 10): 1.0, (1, 2, 11): 0.5, (0, 2, 13): -1.0},
+            output_nodes=[2])
+        self.genome2 = manual_genome(
+            genes={0: ('input', 'identity', 1), 1: ('hidden', 'relu', 2, 0.0), 2: ('output', 'identity', 4, 0.0)},
+            connections={(0, 1, 10): 0.0, (1, 2, 11): 0.5, (0, 2, 12): 2.0},
+            output_nodes=[2])
+
+    def test_hand_computed_distance(self):
+        # Genes: 3 disjunto y 4 de exceso; conexiones: 12 disjunta y 13 de exceso;
+        # diferencia media de peso de las coincidentes (10 y 11): (1.0 + 0.0) / 2
+        species = N.Species(self.genome1)
+        self.assertAlmostEqual(species.calculate_compatibility_distance(self.genome2), 4 / 3 + 0.5)
+        self.assertAlmostEqual(species.calculate_compatibility_distance(self.genome2, c1=1.0, c2=2.0, c3=0.4), 6 / 3 + 0.2)
+
+    def test_identical_genomes(self):
+        self.assertEqual(N.Species(self.genome1).calculate_compatibility_distance(self.genome1.copy()), 0.0)
+
+    def test_repeated_connection_innovations(self):
+        # Las claves son (in, out, innovación): dos conexiones pueden compartir innovación, y solo cuenta la primera
+        genes = {0: ('input', 'identity', 1), 1: ('hidden', 'relu', 2, 0.0), 2: ('output', 'identity', 3, 0.0)}
+        genome1 = manual_genome(genes, {(0, 1, 10): 1.0, (0, 2, 10): 3.0, (1, 2, 11): 0.5}, [2])
+        genome2 = manual_genome(genes, {(0, 1, 10): 0.0, (1, 2, 11): 0.5}, [2])
+        species = N.Species(genome1)
+        self.assertAlmostEqual(species.calculate_compatibility_distance(genome2, c3=0.1), 0.05)
+        self.assertAlmostEqual(species.calculate_compatibility_distance(genome2, c3=0.1, compatibility_threshold=0.3), 0.05)
+        np.testing.assert_allclose(N.compatibility_distances(genome2, [species], c3=0.1), [0.05])
+
+    def test_early_exit_only_above_threshold(self):
+        genomes, _ = random_genomes(30, seed=2)
+        for representative in genomes:
+            species = N.Species(representative)
+            for genome in genomes:
+                distance = species.calculate_compatibility_distance(genome)
+                bounded = species.calculate_compatibility_distance(genome, compatibility_threshold=1.0)
+                if math.isinf(bounded):
+                    self.assertGreater(distance, 1.0)
+                else:
+                    self.assertEqual(bounded, distance)
+
+    def test_batched_distances_match_pairwise(self):
+        genomes, _ = random_genomes(40, seed=3)
+        species_list = [N.Species(genome) for genome in genomes]
+        for genome in genomes:
+            expected = [species.calculate_compatibility_distance(genome, 1.0, 0.7, 0.4) for species in species_list]
+            np.testing.assert_allclose(N.compatibility_distances(genome, species_list, 1.0, 0.7, 0.4), expected, rtol=1e-12)
+            first_compatible = next((species for species in species_list if species.is_compatible(genome, 0.5)), None)
+            self.assertIs(N.find_compatible_species(genome, species_list, 0.5), first_compatible)
+        self.assertEqual(len(N.compatibility_distances(genomes[0], [])), 0)
+
+
+class TestCrossover(unittest.TestCase):
+    def test_child_inherits_from_fittest_parent(self):
+        genomes, innovation_manager = random_genomes(20, seed=4)
+        for parent1, parent2 in zip(genomes, genomes[1:]):
+            child = N.crossover(parent1, parent2, innovation_manager)
+            fittest = parent1 if parent1.fitness > parent2.fitness else parent2
+            other = parent2 if fittest is parent1 else parent1
+
+            fittest_innovations = {key[2] for key in fittest.connections}
+            self.assertEqual({key[2] for key in child.connections}, fittest_innovations)
+            for key, weight in child.connections.items():
+                self.assertTrue(fittest.connections.get(key) == weight or other.connections.get(key) == weight)
+
+            self.assertEqual({gene[2] for gene in child.genes.values()}, {gene[2] for gene in fittest.genes.values()})
+
+    def test_child_tracks_next_node_id(self):
+        genomes, innovation_manager = random_genomes(20, seed=4)
+        for parent1, parent2 in zip(genomes, genomes[1:]):
+            child = N.crossover(parent1, parent2, innovation_manager)
+            self.assertEqual(child.next_node_id, max(child.genes) + 1)
+
+    def test_reproducible_under_random_seed(self):
+        def children():
+            genomes, innovation_manager = random_genomes(10, seed=5)
+            return [(child.genes, child.connections)
+                    for child in (N.crossover(a, b, innovation_manager) for a, b in zip(genomes, genomes[1:]))]
+        self.assertEqual(children(), children())
+
+    def test_child_skips_constructor(self):
+        genomes, innovation_manager = random_genomes(10, seed=7)
+        innovations = dict(innovation_manager.innovations)
+        next_genome_id = innovation_manager.next_genome_id_counter
+        child = N.crossover(genomes[0], genomes[1], innovation_manager)
+        self.assertEqual(innovation_manager.innovations, innovations)
+        self.assertEqual(child.genome_id, next_genome_id)
+        num_inputs = genomes[0].get_num_inputs()
+        self.assertEqual(child.output_nodes, list(range(num_inputs + 8, num_inputs + 8 + genomes[0].get_num_outputs())))
+
+
+class TestSpecies(unittest.TestCase):
+    def test_adjusted_fitness_of_copies(self):
+        random.seed(8)
+        parent = N.Population(1, N.InnovationManager()).create_initial_genome_population(3, 1)
+        parent.fitness = 5.0
+        species = N.Species(parent)
+        siblings = [parent.copy() for _ in range(3)]
+        self.assertEqual(len({genome.genome_id for genome in [parent] + siblings}), 4)
+        for fitness, sibling in enumerate(siblings):
+            sibling.fitness = float(fitness)
+            species.add_member(sibling)
+        species.adjust_fitnesses()
+        for genome in species.members:
+            self.assertEqual(species.get_adjusted_fitness(genome), genome.fitness / 4)
+
+
+class TestStagnationManager(unittest.TestCase):
+    def species(self, fitness):
+        genome = manual_genome({0: ('input', 'identity', 1)}, {}, [])
+        genome.fitness = fitness
+        return N.Species(genome)
+
+    def test_history_survives_absence_until_extinction(self):
+        manager = N.StagnationManager(max_stagnation=3, elitism=0)
+        stagnant, other = self.species(1.0), self.species(2.0)
+        manager.update([stagnant, other], generation=0)
+        manager.update([other], generation=1)  # stagnant falta en esta llamada
+        self.assertEqual(manager.species_last_improved[stagnant], 0)
+        self.assertTrue(manager.update([stagnant, other], generation=3)[stagnant])
+
+        stagnant.members = []
+        manager.update([other], generation=4)
+        self.assertNotIn(stagnant, manager.species_last_improved)
+
+
+class TestFitnessDeterminism(unittest.TestCase):
+    """El caché de fitness de Population supone que el fitness solo depende de la clave estructural."""
+
+    @classmethod
+    def setUpClass(cls):
+        torch.manual_seed(0)
+        cls.features = torch.randn(16, 5)
+        cls.targets = torch.rand(16, 1) + 1
+        cls.graph_data = list(zip(cls.features, cls.targets))
+
+    def setUp(self):
+        random.seed(6)
+        self.innovation_manager = N.InnovationManager()
+        self.population = N.Population(8, self.innovation_manager)
+        self.population.create_initial_population(5, 1)
+
+    def test_same_genome_same_fitness(self):
+        genome = self.population.population[0]
+        fitness = genome.evaluate_batch(self.features, self.targets)
+        self.assertEqual(genome.evaluate_batch(self.features, self.targets), fitness)
+        self.assertEqual(genome.copy().evaluate_batch(self.features, self.targets), fitness)
+        self.assertEqual(N.evaluate_genome(genome, self.features, self.targets),
+                         N.evaluate_genome(genome.copy(), self.features, self.targets))
+
+    def test_concurrent_threads_match_sequential(self):
+        genomes = self.population.population
+        expected = [genome.evaluate_batch(self.features, self.targets) for genome in genomes]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            fitnesses = list(executor.map(lambda genome: genome.evaluate_batch(self.features, self.targets), genomes * 4))
+        np.testing.assert_allclose(fitnesses, expected * 4, rtol=1e-4, atol=1e-5)
+
+    def test_network_seed_follows_structure(self):
+        genome = self.population.population[0]
+        copy = genome.copy()
+        self.assertEqual(copy._network_seed(), genome._network_seed())
+        copy.mutate_weights(mutation_rate=1.0)
+        self.assertNotEqual(copy._network_seed(), genome._network_seed())
+        seed = copy._network_seed()
+        copy.mutate_biases(mutation_rate=1.0)
+        self.assertNotEqual(copy._network_seed(), seed)
+
+    def test_cached_fitness_matches_fresh_evaluation(self):
+        for _ in range(2):
+            self.population.evaluate_fitness(self.graph_data)
+            for genome in self.population.population:
+                self.assertAlmostEqual(genome.fitness, genome.copy().evaluate_batch(self.features, self.targets), places=5)
+            self.population.reproduce_and_mutate(8, 0.3, N.crossover, N.mutate)
+
+    def test_vectorized_matches_per_genome(self):
+        genomes = self.population.population
+        expected = [genome.evaluate_batch(self.features, self.targets) for genome in genomes]
+        np.testing.assert_allclose(N.evaluate_population(genomes, self.features, self.targets), expected, rtol=1e-4, atol=1e-5)
+
+    def test_empty_population(self):
+        self.assertEqual(N.evaluate_population([], self.features, self.targets), [])
+
+    def test_dataset_copied_once_per_device(self):
+        features, targets = self.features.clone(), self.targets.clone()
+        device = torch.device('cpu')
+        copied = N._dataset_on_device(features, targets, device, torch.bfloat16)
+        self.assertEqual(copied[0].dtype, torch.bfloat16)
+        self.assertIs(N._dataset_on_device(features, targets, device, torch.bfloat16)[0], copied[0])
+        features.mul_(2.0)
+        recopied = N._dataset_on_device(features, targets, device, torch.bfloat16)[0]
+        self.assertIsNot(recopied, copied[0])
+        torch.testing.assert_close(recopied, features.to(torch.bfloat16))
+
+    def test_structural_hash_is_stable_across_processes(self):
+        genome = self.population.population[0]
+        script = ("import pickle, sys; sys.path.insert(0, '.'); import NEATNNG; "
+                  "print(pickle.loads(sys.stdin.buffer.read()).structural_hash())")
+        # Otra semilla de hash(): el resultado no debe depender de ella
+        result = subprocess.run([sys.executable, '-c', script], input=pickle.dumps(genome), capture_output=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(N.__file__)), env={**os.environ, 'PYTHONHASHSEED': '1'})
+        self.assertEqual(int(result.stdout), genome.structural_hash())
+
+    def test_evaluate_genome_memo(self):
+        features, targets = self.features.clone(), self.targets.clone()
+        genome = self.population.population[0]
+        fitness = N.evaluate_genome(genome, features, targets)
+        with mock.patch.object(N.FeedforwardGenome, 'create_pytorch_network', side_effect=AssertionError):
+            self.assertEqual(N.evaluate_genome(genome.copy(), features, targets), fitness)
+        targets.add_(1.0)
+        self.assertNotEqual(N.evaluate_genome(genome, features, targets), fitness)
+        N._evaluate_genome_cache.clear()
+        self.assertEqual(N.evaluate_genome(genome, features, targets), N.evaluate_genome(genome.copy(), features.clone(), targets))
+
+    def test_cache_follows_dataset(self):
+        graph_data = [(features.clone(), target.clone()) for features, target in self.graph_data]
+        self.population.evaluate_fitness(graph_data)
+        stacked = self.population._stack_dataset(graph_data)
+        self.assertIs(self.population._stack_dataset(list(graph_data))[0], stacked[0])
+
+        graph_data[0][1].add_(1.0)  # Modificación en el sitio: los datos cambian sin cambiar de objeto
+        self.population.evaluate_fitness(graph_data)
+        features, targets = N._stack_graph_data(graph_data)
+        for genome in self.population.population:
+            self.assertAlmostEqual(genome.fitness, genome.copy().evaluate_batch(features, targets), places=5)
+
+
+if __name__ == '__main__':
+    unittest.main()